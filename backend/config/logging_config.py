@@ -0,0 +1,34 @@
+"""
+Logging configuration
+Records are handed to a queue and written by a background thread,
+so logging never blocks the event loop on stderr.
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def setup_logging(environment: str) -> QueueListener:
+    """
+    Configure root logging once for the whole app.
+
+    Args:
+        environment: App environment (production logs WARNING and above)
+
+    Returns:
+        Started QueueListener (stop it on shutdown to flush pending records)
+    """
+    level = logging.WARNING if environment == "production" else logging.INFO
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    logging.basicConfig(level=level, handlers=[QueueHandler(log_queue)], force=True)
+    listener.start()
+
+    return listener
@@ -2,45 +2,95 @@
 Configuration settings loaded from environment variables
 """
 import os
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 
-load_dotenv()
+# Marks a setting that must be present for the app to start
+REQUIRED = {"required": True}
+
+
+@dataclass(slots=True, frozen=True)
+class Settings:
+    """Immutable snapshot of the environment, read once per process"""
+    # Supabase
+    supabase_url: Optional[str] = field(default=None, metadata=REQUIRED)
+    supabase_anon_key: Optional[str] = None
+    supabase_service_role_key: Optional[str] = field(default=None, metadata=REQUIRED)
+
+    # AI Models
+    anthropic_api_key: Optional[str] = field(default=None, metadata=REQUIRED)
+    openai_api_key: Optional[str] = field(default=None, metadata=REQUIRED)
+    memory_max_token_limit: int = 800
+
+    # Voice Services
+    twilio_account_sid: Optional[str] = None
+    twilio_auth_token: Optional[str] = None
+    twilio_phone_number: Optional[str] = None
+    deepgram_api_key: Optional[str] = None
+    elevenlabs_api_key: Optional[str] = None
+    elevenlabs_voice_id: Optional[str] = None
+    tts_cache_dir: str = "/tmp/tts_cache"
+
+    # Redis
+    redis_url: str = "redis://localhost:6379"
+
+    # App Settings
+    environment: str = "development"
+    port: int = 8000
+
+
+@lru_cache(maxsize=1)
+def _settings() -> Settings:
+    """Load .env once and snapshot every setting (env var name = field name, uppercased)"""
+    load_dotenv(override=False)
+
+    values = {}
+    for f in fields(Settings):
+        value = os.getenv(f.name.upper())
+        if value is not None:
+            values[f.name] = f.type(value) if f.type is int else value
+
+    return Settings(**values)
+
+
+settings = _settings()
 
 # Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+SUPABASE_URL = settings.supabase_url
+SUPABASE_ANON_KEY = settings.supabase_anon_key
+SUPABASE_SERVICE_ROLE_KEY = settings.supabase_service_role_key
 
 # AI Models
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+ANTHROPIC_API_KEY = settings.anthropic_api_key
+OPENAI_API_KEY = settings.openai_api_key
+MEMORY_MAX_TOKEN_LIMIT = settings.memory_max_token_limit
 
 # Voice Services
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
-DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+TWILIO_ACCOUNT_SID = settings.twilio_account_sid
+TWILIO_AUTH_TOKEN = settings.twilio_auth_token
+TWILIO_PHONE_NUMBER = settings.twilio_phone_number
+DEEPGRAM_API_KEY = settings.deepgram_api_key
+ELEVENLABS_API_KEY = settings.elevenlabs_api_key
+ELEVENLABS_VOICE_ID = settings.elevenlabs_voice_id
+TTS_CACHE_DIR = settings.tts_cache_dir
 
 # Redis
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_URL = settings.redis_url
 
 # App Settings
-ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-PORT = int(os.getenv("PORT", 8000))
+ENVIRONMENT = settings.environment
+PORT = settings.port
 
 # Validate required settings
 def validate_settings():
     """Validate that required environment variables are set"""
-    required = {
-        "SUPABASE_URL": SUPABASE_URL,
-        "SUPABASE_SERVICE_ROLE_KEY": SUPABASE_SERVICE_ROLE_KEY,
-        "ANTHROPIC_API_KEY": ANTHROPIC_API_KEY,
-        "OPENAI_API_KEY": OPENAI_API_KEY,
-    }
-
-    missing = [key for key, value in required.items() if not value]
+    missing = [
+        f.name.upper()
+        for f in fields(settings)
+        if f.metadata.get("required") and not getattr(settings, f.name)
+    ]
 
     if missing:
         raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
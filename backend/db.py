@@ -0,0 +1,42 @@
+"""
+Database client
+Shared Supabase client with an explicit connection pool
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+@lru_cache(maxsize=1)
+def get_supabase() -> "Client":
+    """
+    Get the shared Supabase client.
+
+    Built once per process and reused by every route (FastAPI dependency).
+    Keep-alive connections are pooled so requests skip the TCP/TLS handshake.
+
+    Returns:
+        Supabase client
+    """
+    # Imported here so the client library loads on first use, not at startup
+    import httpx
+    from supabase import ClientOptions, create_client
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=1800
+        ),
+        timeout=30
+    )
+
+    return create_client(
+        SUPABASE_URL,
+        SUPABASE_SERVICE_ROLE_KEY,
+        options=ClientOptions(httpx_client=http_client)
+    )
@@ -2,24 +2,87 @@
 ProShop 24/7 - FastAPI Backend
 Main application entry point
 """
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
-
-from routes import chat, voice, demo
-from models.schemas import HealthResponse
+from fastapi.responses import ORJSONResponse
+
+from routes import chat, voice, demo, rtc
+from services import embeddings, insert_batcher, memory, session_store
+from services.voice import close_http_client, prune_tts_cache_forever
+from services.demo_generator import close_clients as close_demo_clients, wait_for_pending_leads
+from db import get_supabase
+from models.schemas import HealthResponse, HEALTH_RESPONSES
 from config.settings import validate_settings, ENVIRONMENT, PORT
+from config.logging_config import setup_logging
+
+# Validate environment variables on startup (development only -
+# deploy builds run `python -m tools.validate_settings` instead)
+if ENVIRONMENT == "development":
+    try:
+        validate_settings()
+        print("✅ Environment variables validated")
+    except ValueError as e:
+        print(f"❌ Configuration error: {e}")
+        print("Please check your .env file")
+        exit(1)
+
+# Non-blocking logging (records are written by a background thread)
+log_listener = setup_logging(ENVIRONMENT)
+
+logger = logging.getLogger(__name__)
+
+# Threads for blocking work (agent calls, Supabase queries) via asyncio.to_thread.
+# Sized above the default so concurrent voice calls don't queue behind each other.
+THREAD_POOL_SIZE = 64
+
+# Warmup is best effort - a slow or unreachable API mustn't hold up readiness
+WARMUP_TIMEOUT_SECONDS = 5
+
+
+@asynccontextmanager
+async def warmup(app: FastAPI):
+    """Warm clients and heavy imports so the first request doesn't pay for them"""
+    def warm_supabase():
+        get_supabase().table('demo_courses').select('id').limit(1).execute()
+
+    def warm_agent():
+        from services.agent import warmup as warm_agent_client
+        warm_agent_client(WARMUP_TIMEOUT_SECONDS)
+
+    def warm_email_validator():
+        # EmailStr imports email_validator lazily on the first /demo/create
+        import email_validator  # noqa: F401
+
+    async def warm_phrase_audio():
+        # Synthesize the call greeting and filler phrases so no caller waits on TTS for them
+        from services.voice import phrase_to_speech_for_twilio
+        await asyncio.gather(*(
+            phrase_to_speech_for_twilio(text)
+            for text in (voice.WELCOME_TEXT, *voice.FILLER_PHRASES)
+        ))
+
+    steps = (
+        asyncio.to_thread(warm_supabase),
+        asyncio.to_thread(warm_agent),
+        asyncio.to_thread(warm_email_validator),
+        warm_phrase_audio()
+    )
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step, WARMUP_TIMEOUT_SECONDS) for step in steps),
+        return_exceptions=True
+    )
+    names = ("Supabase", "Agent", "Email validator", "Phrase audio")
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.warning("⚠️ %s warmup failed: %r", name, result)
+        else:
+            logger.info("🔥 %s warmed up", name)
 
-# Validate environment variables on startup
-try:
-    validate_settings()
-    print("✅ Environment variables validated")
-except ValueError as e:
-    print(f"❌ Configuration error: {e}")
-    print("Please check your .env file")
-    exit(1)
+    yield
 
 
 @asynccontextmanager
@@ -34,21 +97,41 @@ async def lifespan(app: FastAPI):
     print(f"Docs: http://localhost:{PORT}/docs")
     print("="*60 + "\n")
 
-    yield
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE)
+    )
+    insert_batcher.start(get_supabase())
+    tts_cache_pruner = asyncio.create_task(prune_tts_cache_forever())
+
+    async with warmup(app):
+        yield
 
     # Shutdown
+    tts_cache_pruner.cancel()
+    await insert_batcher.stop()
+    await memory.wait_for_pending_stores()
+    await wait_for_pending_leads()
+    await embeddings.stop()
+    await session_store.close()
+    await close_http_client()
+    await close_demo_clients()
+    log_listener.stop()
     print("\n" + "="*60)
     print("👋 ProShop 24/7 API Shutting Down...")
     print("="*60 + "\n")
 
 
 # Create FastAPI app
+# API docs are disabled in production so the OpenAPI schema is never built
+is_production = ENVIRONMENT == "production"
 app = FastAPI(
     title="ProShop 24/7 API",
     description="AI Voice Agent for Golf Courses",
     version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
+    docs_url=None if is_production else "/docs",
+    redoc_url=None if is_production else "/redoc",
+    openapi_url=None if is_production else "/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -66,9 +149,10 @@ app.add_middleware(
 app.include_router(chat.router, prefix="/v1", tags=["Chat"])
 app.include_router(voice.router, prefix="/v1", tags=["Voice"])
 app.include_router(demo.router, prefix="/v1", tags=["Demo"])
+app.include_router(rtc.router, prefix="/v1", tags=["Voice"])
 
 
-@app.get("/", response_model=HealthResponse)
+@app.get("/", response_model=HealthResponse, responses=HEALTH_RESPONSES)
 async def root():
     """Root endpoint - health check"""
     return HealthResponse(
@@ -78,7 +162,7 @@ async def root():
     )
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", response_model=HealthResponse, responses=HEALTH_RESPONSES)
 async def health_check():
     """Health check endpoint"""
     return HealthResponse(
@@ -88,11 +172,24 @@ async def health_check():
     )
 
 
+@app.get("/metrics")
+async def metrics():
+    """Process-level metrics for this worker"""
+    return {
+        "active_sessions": session_store.session_count()
+    }
+
+
 # For running directly with python main.py
+# Profile startup with: python -X importtime -c "import main" 2>&1 | tuna
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=PORT,
-        reload=True if ENVIRONMENT == "development" else False
+        reload=True if ENVIRONMENT == "development" else False,
+        http="httptools",
+        loop="uvloop"
     )
@@ -1,53 +1,36 @@
 """
 Pydantic schemas for API request/response validation
 """
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint"""
-    message: str = Field(..., description="User's message", min_length=1)
-    session_id: str = Field(..., description="Unique session identifier")
-    context: Optional[Dict[str, Any]] = Field(
-        default=None,
-        description="Optional context (demo_slug, phone_number, etc.)"
-    )
+    message: Annotated[str, Field(min_length=1, description="User's message")]
+    session_id: Annotated[str, Field(description="Unique session identifier")]
+    context: Annotated[
+        Optional[Dict[str, Any]],
+        Field(description="Optional context (demo_slug, phone_number, etc.)")
+    ] = None
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "message": "What are your hours?",
-                "session_id": "session_123abc",
-                "context": {
-                    "demo_slug": "fox-hollow"
-                }
-            }
-        }
+    model_config = ConfigDict(defer_build=True)
 
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint"""
-    response: str = Field(..., description="Agent's response")
-    session_id: str = Field(..., description="Session identifier")
-    interaction_count: Optional[int] = Field(
-        default=None,
-        description="Number of interactions used (demo mode only)"
-    )
-    interaction_limit: Optional[int] = Field(
-        default=None,
-        description="Total interaction limit (demo mode only)"
-    )
+    response: Annotated[str, Field(description="Agent's response")]
+    session_id: Annotated[str, Field(description="Session identifier")]
+    interaction_count: Annotated[
+        Optional[int],
+        Field(description="Number of interactions used (demo mode only)")
+    ] = None
+    interaction_limit: Annotated[
+        Optional[int],
+        Field(description="Total interaction limit (demo mode only)")
+    ] = None
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "response": "We're open from 6:00 AM to 9:00 PM daily!",
-                "session_id": "session_123abc",
-                "interaction_count": 3,
-                "interaction_limit": 25
-            }
-        }
+    model_config = ConfigDict(defer_build=True)
 
 
 class HealthResponse(BaseModel):
@@ -56,11 +39,50 @@ class HealthResponse(BaseModel):
     message: str
     version: str = "1.0.0"
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "message": "ProShop 24/7 API is running",
-                "version": "1.0.0"
+    model_config = ConfigDict(defer_build=True)
+
+
+# OpenAPI examples - attached at the route level so they stay out of
+# the models' core schemas
+
+CHAT_REQUEST_EXAMPLES = {
+    "demo": {
+        "summary": "Demo mode",
+        "value": {
+            "message": "What are your hours?",
+            "session_id": "session_123abc",
+            "context": {
+                "demo_slug": "fox-hollow"
+            }
+        }
+    }
+}
+
+CHAT_RESPONSES = {
+    200: {
+        "content": {
+            "application/json": {
+                "example": {
+                    "response": "We're open from 6:00 AM to 9:00 PM daily!",
+                    "session_id": "session_123abc",
+                    "interaction_count": 3,
+                    "interaction_limit": 25
+                }
+            }
+        }
+    }
+}
+
+HEALTH_RESPONSES = {
+    200: {
+        "content": {
+            "application/json": {
+                "example": {
+                    "status": "healthy",
+                    "message": "ProShop 24/7 API is running",
+                    "version": "1.0.0"
+                }
             }
         }
+    }
+}
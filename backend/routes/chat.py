@@ -2,33 +2,45 @@
 Chat API routes
 Handles text-based conversations with the AI agent
 """
-from fastapi import APIRouter, HTTPException, Request
-from supabase import create_client
-from typing import Dict
+import asyncio
+import logging
+import orjson
+from typing import Annotated, Any, AsyncIterator, Callable, Dict, Optional, Tuple, TYPE_CHECKING
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from postgrest.exceptions import APIError
 import uuid
 
-from models.schemas import ChatRequest, ChatResponse
-from services.agent import create_demo_agent, create_production_agent
+from models.schemas import (
+    ChatRequest,
+    ChatResponse,
+    CHAT_REQUEST_EXAMPLES,
+    CHAT_RESPONSES
+)
+from services import course_cache, insert_batcher, session_store
 from services.memory import (
-    identify_or_create_caller,
-    get_recent_conversations,
+    identify_caller_with_history,
     store_conversation,
-    build_context_string
+    get_context_string,
+    format_transcript
 )
-from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from db import get_supabase
 
-router = APIRouter()
+if TYPE_CHECKING:
+    from supabase import Client
 
-# Initialize Supabase client
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+logger = logging.getLogger(__name__)
 
-# In-memory session storage (for demo - in production use Redis)
-# Maps session_id -> agent instance
-active_sessions: Dict[str, any] = {}
+router = APIRouter()
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def handle_chat(request: Request, chat_request: ChatRequest):
+@router.post("/chat", response_model=ChatResponse, responses=CHAT_RESPONSES)
+async def handle_chat(
+    request: Request,
+    chat_request: Annotated[ChatRequest, Body(openapi_examples=CHAT_REQUEST_EXAMPLES)],
+    background_tasks: BackgroundTasks,
+    supabase: "Client" = Depends(get_supabase)
+):
     """
     Handle text chat with AI agent.
 
@@ -49,14 +61,15 @@ async def handle_chat(request: Request, chat_request: ChatRequest):
         if demo_slug:
             # DEMO MODE
             response_data = await handle_demo_chat(
-                session_id, message, demo_slug
+                supabase, session_id, message, demo_slug
             )
             return response_data
 
         elif phone_number and golf_course_id:
             # PRODUCTION MODE
             response_data = await handle_production_chat(
-                session_id, message, phone_number, golf_course_id
+                supabase, background_tasks, session_id, message,
+                phone_number, golf_course_id
             )
             return response_data
 
@@ -69,86 +82,214 @@ async def handle_chat(request: Request, chat_request: ChatRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in chat endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in chat endpoint: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
 
-async def handle_demo_chat(session_id: str, message: str, demo_slug: str) -> ChatResponse:
+def demo_limit_error(limit: Optional[int]) -> HTTPException:
+    """429 returned once a demo has used all its interactions"""
+    used = f" ({limit} interactions)" if limit is not None else ""
+    return HTTPException(
+        status_code=429,
+        detail=f"Demo limit reached{used}. Contact us to unlock full version!"
+    )
+
+
+async def prepare_demo_session(
+    supabase: "Client",
+    session_id: str,
+    demo_slug: str
+) -> Tuple[Dict, Any]:
     """
-    Handle demo mode chat.
-    Uses demo_courses table, tracks interaction limits.
+    Load the demo course, check its limit, and get the session's agent.
+
+    Returns:
+        (demo course record, agent)
     """
-    # Get demo course
-    response = supabase.table('demo_courses') \
-        .select('*') \
-        .eq('slug', demo_slug) \
-        .execute()
+    # Check interaction limit from the last known count first, so an
+    # exhausted demo is rejected without a database round trip
+    counts = course_cache.get_interaction_counts(demo_slug)
+    if counts and counts[0] >= counts[1]:
+        raise demo_limit_error(counts[1])
 
-    if not response.data:
-        raise HTTPException(status_code=404, detail=f"Demo not found: {demo_slug}")
+    # Get demo course (cached; chat_demo_turn enforces the exact count)
+    # (the Supabase client is blocking, so a cache miss runs in a thread)
+    demo_course = await asyncio.to_thread(course_cache.get_demo_course, supabase, demo_slug)
 
-    demo_course = response.data[0]
+    if not demo_course:
+        raise HTTPException(status_code=404, detail=f"Demo not found: {demo_slug}")
 
     # Check interaction limit
     if demo_course['interaction_count'] >= demo_course['interaction_limit']:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Demo limit reached ({demo_course['interaction_limit']} interactions). Contact us to unlock full version!"
-        )
+        raise demo_limit_error(demo_course['interaction_limit'])
 
     # Get or create agent for this session
-    if session_id not in active_sessions:
-        agent = create_demo_agent(demo_course)
-        active_sessions[session_id] = agent
-        print(f"✨ New demo session created: {session_id}")
-    else:
-        agent = active_sessions[session_id]
-        print(f"♻️ Reusing existing session: {session_id}")
+    # (LangChain is imported on first use, not at app startup)
+    from services.agent import create_demo_agent
 
-    # Get agent response
+    agent = await session_store.get_or_create(
+        session_id,
+        {'demo_course': demo_course},
+        lambda seed: create_demo_agent(seed['demo_course'])
+    )
+
+    return demo_course, agent
+
+
+def raise_if_demo_limit(error: APIError, demo_slug: str):
+    """Turn the database's limit-reached error (P0001) into a 429"""
+    if error.code == 'P0001':
+        counts = course_cache.get_interaction_counts(demo_slug)
+        limit = counts[1] if counts else None
+        # Mark the demo as exhausted so later requests fail fast
+        if limit is not None:
+            course_cache.mark_demo_exhausted(demo_slug)
+        raise demo_limit_error(limit)
+
+
+async def reserve_demo_turn(
+    supabase: "Client",
+    demo_slug: str,
+    session_id: str,
+    channel: str = 'text-chat'
+) -> str:
+    """
+    Claim a demo interaction before the reply is generated (streamed turns).
+    reserve_demo_turn checks the limit under the same row lock as chat_demo_turn;
+    the transcript is filled in afterwards via insert_batcher.
+
+    Returns:
+        ID of the reserved demo_interactions row
+    """
     try:
-        response = agent.invoke({"input": message})
+        result = await asyncio.to_thread(
+            supabase.rpc('reserve_demo_turn', {
+                'p_slug': demo_slug,
+                'p_session_id': session_id,
+                'p_channel': channel
+            }).execute
+        )
+    except APIError as e:
+        raise_if_demo_limit(e, demo_slug)
+        raise
 
-        # Extract response text
-        if isinstance(response, dict):
-            response_text = response.get('response', str(response))
-        else:
-            response_text = str(response)
-    except Exception as e:
-        print(f"❌ Agent error: {e}")
-        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+    course_cache.increment_interaction_count(demo_slug)
+    return result.data
 
-    # Record interaction
-    interaction = {
-        'demo_course_id': demo_course['id'],
-        'channel': 'text-chat',
-        'transcript': f"User: {message}\nAgent: {response_text}",
-        'session_id': session_id
-    }
 
-    supabase.table('demo_interactions').insert(interaction).execute()
-    print(f"📝 Demo interaction recorded (count: {demo_course['interaction_count'] + 1})")
+async def record_demo_turn(
+    supabase: "Client",
+    demo_slug: str,
+    session_id: str,
+    message: str,
+    response_text: str
+) -> Dict:
+    """
+    Record a demo interaction and read back the updated count in one round trip.
+    chat_demo_turn re-checks the limit under a row lock.
 
-    # Get updated count (trigger increments it automatically)
-    updated_course = supabase.table('demo_courses') \
-        .select('interaction_count, interaction_limit') \
-        .eq('id', demo_course['id']) \
-        .execute()
+    Returns:
+        Updated demo course record
+    """
+    try:
+        result = await asyncio.to_thread(
+            supabase.rpc('chat_demo_turn', {
+                'p_slug': demo_slug,
+                'p_session_id': session_id,
+                'p_transcript': format_transcript(message, response_text)
+            }).execute
+        )
+    except APIError as e:
+        raise_if_demo_limit(e, demo_slug)
+        raise
+
+    updated_course = result.data[0]
+    course_cache.update_demo_course(updated_course)
+    logger.info("📝 Demo interaction recorded (count: %s)", updated_course['interaction_count'])
 
-    new_count = updated_course.data[0]['interaction_count']
-    limit = updated_course.data[0]['interaction_limit']
+    return updated_course
+
+
+async def handle_demo_chat(
+    supabase: "Client",
+    session_id: str,
+    message: str,
+    demo_slug: str
+) -> ChatResponse:
+    """
+    Handle demo mode chat.
+    Uses demo_courses table, tracks interaction limits.
+    """
+    demo_course, agent = await prepare_demo_session(supabase, session_id, demo_slug)
+
+    response_text = await invoke_agent(agent, message)
+
+    updated_course = await record_demo_turn(
+        supabase, demo_slug, session_id, message, response_text
+    )
 
     return ChatResponse(
         response=response_text,
         session_id=session_id,
-        interaction_count=new_count,
-        interaction_limit=limit
+        interaction_count=updated_course['interaction_count'],
+        interaction_limit=updated_course['interaction_limit']
+    )
+
+
+async def prepare_production_session(
+    supabase: "Client",
+    session_id: str,
+    phone_number: str,
+    golf_course_id: str
+) -> Tuple[Dict, Any]:
+    """
+    Load the golf course and caller context, and get the session's agent.
+
+    Returns:
+        (caller record, agent)
+    """
+    # Get golf course, caller and conversation history concurrently
+    # (the Supabase client is blocking, so each call runs in a thread)
+    golf_course, caller_context = await asyncio.gather(
+        asyncio.to_thread(course_cache.get_golf_course, supabase, golf_course_id),
+        asyncio.to_thread(
+            identify_caller_with_history, supabase, phone_number, golf_course_id, 3
+        ),
+        return_exceptions=True
     )
 
+    if isinstance(golf_course, Exception):
+        raise golf_course
+    if not golf_course:
+        raise HTTPException(status_code=404, detail=f"Golf course not found")
+    if isinstance(caller_context, Exception):
+        raise caller_context
+
+    caller, recent_conversations = caller_context
+    conversation_history = get_context_string(caller['id'], recent_conversations)
+
+    # Get or create agent for this session
+    # (LangChain is imported on first use, not at app startup)
+    from services.agent import create_production_agent
+
+    agent = await session_store.get_or_create(
+        session_id,
+        {
+            'golf_course': golf_course,
+            'caller': caller,
+            'conversation_history': conversation_history
+        },
+        lambda seed: create_production_agent(
+            seed['golf_course'], seed['caller'], seed['conversation_history']
+        )
+    )
+
+    return caller, agent
+
 
 async def handle_production_chat(
+    supabase: "Client",
+    background_tasks: BackgroundTasks,
     session_id: str,
     message: str,
     phone_number: str,
@@ -158,59 +299,154 @@ async def handle_production_chat(
     Handle production mode chat.
     Uses full memory system, stores conversations permanently.
     """
-    # Get golf course
-    response = supabase.table('golf_courses') \
-        .select('*') \
-        .eq('id', golf_course_id) \
-        .execute()
-
-    if not response.data:
-        raise HTTPException(status_code=404, detail=f"Golf course not found")
+    caller, agent = await prepare_production_session(
+        supabase, session_id, phone_number, golf_course_id
+    )
 
-    golf_course = response.data[0]
+    response_text = await invoke_agent(agent, message)
 
-    # Identify or create caller
-    caller = identify_or_create_caller(supabase, phone_number, golf_course_id)
+    # Store conversation after the response is sent
+    transcript = format_transcript(message, response_text)
+    background_tasks.add_task(
+        store_conversation,
+        supabase=supabase,
+        caller_id=caller['id'],
+        golf_course_id=golf_course_id,
+        transcript=transcript,
+        channel='text-chat'
+    )
 
-    # Get conversation history
-    recent_conversations = get_recent_conversations(supabase, caller['id'], limit=3)
-    conversation_history = build_context_string(recent_conversations)
+    return ChatResponse(
+        response=response_text,
+        session_id=session_id
+    )
 
-    # Get or create agent for this session
-    if session_id not in active_sessions:
-        agent = create_production_agent(golf_course, caller, conversation_history)
-        active_sessions[session_id] = agent
-        print(f"✨ New production session created: {session_id}")
-    else:
-        agent = active_sessions[session_id]
-        print(f"♻️ Reusing existing session: {session_id}")
 
-    # Get agent response
+async def invoke_agent(agent, message: str) -> str:
+    """Run one agent turn and return the response text (without blocking the event loop)"""
     try:
-        response = agent.invoke({"input": message})
+        response = await agent.ainvoke({"input": message})
 
         # Extract response text
         if isinstance(response, dict):
-            response_text = response.get('response', str(response))
-        else:
-            response_text = str(response)
+            return response.get('response', str(response))
+        return str(response)
     except Exception as e:
-        print(f"❌ Agent error: {e}")
+        logger.exception("❌ Agent error: %s", e)
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
-    # Store conversation
-    transcript = f"User: {message}\nAgent: {response_text}"
-    store_conversation(
-        supabase=supabase,
-        caller_id=caller['id'],
-        golf_course_id=golf_course_id,
-        transcript=transcript,
-        channel='text-chat'
+
+def chunk_text(chunk) -> str:
+    """Extract text from a streamed chat model chunk (str or content blocks)"""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get('text', '') for block in content if isinstance(block, dict)
     )
 
-    print(f"💾 Production conversation stored for caller {caller['id']}")
 
-    return ChatResponse(
-        response=response_text,
-        session_id=session_id
+async def stream_agent_reply(
+    agent,
+    message: str,
+    session_id: str,
+    on_complete: Callable[[str], None]
+) -> AsyncIterator[bytes]:
+    """
+    Stream an agent turn as Server-Sent Events.
+
+    Args:
+        agent: Session agent
+        message: User's message
+        session_id: Session identifier
+        on_complete: Called with the full response text once the stream ends
+    """
+    chunks = []
+    try:
+        async for event in agent.astream_events({"input": message}, version="v2"):
+            if event['event'] != 'on_chat_model_stream':
+                continue
+
+            text = chunk_text(event['data']['chunk'])
+            if text:
+                chunks.append(text)
+                yield b"data: " + orjson.dumps({'token': text}) + b"\n\n"
+
+        yield b"data: " + orjson.dumps({'done': True, 'session_id': session_id}) + b"\n\n"
+
+    except Exception as e:
+        logger.exception("❌ Agent error: %s", e)
+        yield b"data: " + orjson.dumps({'error': f'Agent error: {str(e)}'}) + b"\n\n"
+
+    finally:
+        if chunks:
+            on_complete("".join(chunks))
+
+
+@router.post("/chat/stream")
+async def handle_chat_stream(
+    chat_request: Annotated[ChatRequest, Body(openapi_examples=CHAT_REQUEST_EXAMPLES)],
+    background_tasks: BackgroundTasks,
+    supabase: "Client" = Depends(get_supabase)
+):
+    """
+    Stream the agent's response token by token (Server-Sent Events).
+
+    Same modes as /chat. Each event is `data: {"token": "..."}`, and the
+    last one is `data: {"done": true, "session_id": "..."}`.
+    Demo turns are counted before streaming starts; the transcript is
+    recorded after the stream closes.
+    """
+    session_id = chat_request.session_id
+    message = chat_request.message
+    context = chat_request.context or {}
+
+    demo_slug = context.get('demo_slug')
+    phone_number = context.get('phone_number')
+    golf_course_id = context.get('golf_course_id')
+
+    if demo_slug:
+        # DEMO MODE
+        demo_course, agent = await prepare_demo_session(supabase, session_id, demo_slug)
+
+        # Claim the turn under the database's limit lock before streaming,
+        # so concurrent streams (on any worker) can't overrun the limit
+        interaction_id = await reserve_demo_turn(supabase, demo_slug, session_id)
+
+        def on_complete(response_text: str):
+            # The stream doesn't report counts, so the transcript can be batched
+            insert_batcher.enqueue({
+                'id': interaction_id,
+                'demo_course_id': demo_course['id'],
+                'channel': 'text-chat',
+                'session_id': session_id,
+                'user_message': message,
+                'agent_response': response_text
+            })
+
+    elif phone_number and golf_course_id:
+        # PRODUCTION MODE
+        caller, agent = await prepare_production_session(
+            supabase, session_id, phone_number, golf_course_id
+        )
+
+        def on_complete(response_text: str):
+            background_tasks.add_task(
+                store_conversation,
+                supabase=supabase,
+                caller_id=caller['id'],
+                golf_course_id=golf_course_id,
+                transcript=format_transcript(message, response_text),
+                channel='text-chat'
+            )
+
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Must provide either demo_slug or (phone_number + golf_course_id)"
+        )
+
+    return StreamingResponse(
+        stream_agent_reply(agent, message, session_id, on_complete),
+        media_type="text/event-stream"
     )
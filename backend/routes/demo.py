@@ -2,34 +2,49 @@
 Demo System Routes
 API endpoints for creating and managing custom demos
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
-from supabase import create_client
+import logging
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Path
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, HttpUrl, field_validator
+from typing import Annotated, Optional, TYPE_CHECKING
 
 from services.demo_generator import create_demo_course
-from config.settings import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from services import course_cache
+from db import get_supabase
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Slugs produced by generate_slug - malformed ones are rejected before any DB call
+Slug = Annotated[str, Path(pattern=r"^[a-z0-9-]{1,128}$")]
 
 
 class CreateDemoRequest(BaseModel):
     """Request model for creating a demo"""
     course_name: str = Field(..., description="Golf course name", min_length=2)
-    website_url: str = Field(..., description="Golf course website URL")
+    website_url: HttpUrl = Field(..., description="Golf course website URL")
     email: EmailStr = Field(..., description="Email for updates")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra={
             "example": {
                 "course_name": "Pine Valley Golf Club",
                 "website_url": "https://pinevalleygolfclub.com",
                 "email": "owner@pinevalley.com"
             }
         }
+    )
+
+    @field_validator('website_url', mode='before')
+    @classmethod
+    def add_url_scheme(cls, value):
+        """Accept bare domains like "pinevalley.com" (assume https)"""
+        if isinstance(value, str) and not value.startswith(('http://', 'https://')):
+            return 'https://' + value
+        return value
 
 
 class CreateDemoResponse(BaseModel):
@@ -39,6 +54,8 @@ class CreateDemoResponse(BaseModel):
     demo_url: str
     message: str
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class DemoInfoResponse(BaseModel):
     """Response model for demo info"""
@@ -51,9 +68,15 @@ class DemoInfoResponse(BaseModel):
     status: str
     ai_data: Optional[dict]
 
+    model_config = ConfigDict(defer_build=True)
+
 
 @router.post("/demo/create", response_model=CreateDemoResponse)
-async def create_demo(request: CreateDemoRequest, background_tasks: BackgroundTasks):
+async def create_demo(
+    request: CreateDemoRequest,
+    background_tasks: BackgroundTasks,
+    supabase: "Client" = Depends(get_supabase)
+):
     """
     Create a custom demo for a golf course.
 
@@ -71,10 +94,11 @@ async def create_demo(request: CreateDemoRequest, background_tasks: BackgroundTa
         # In production, this would be a background job
         demo_course = await create_demo_course(
             course_name=request.course_name,
-            website_url=request.website_url,
+            website_url=str(request.website_url),
             email=request.email,
             supabase=supabase
         )
+        course_cache.invalidate_demo_course(demo_course['slug'])
 
         return CreateDemoResponse(
             demo_id=demo_course['id'],
@@ -84,14 +108,12 @@ async def create_demo(request: CreateDemoRequest, background_tasks: BackgroundTa
         )
 
     except Exception as e:
-        print(f"❌ Error creating demo: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error creating demo: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create demo: {str(e)}")
 
 
 @router.get("/demo/{slug}/info", response_model=DemoInfoResponse)
-async def get_demo_info(slug: str):
+async def get_demo_info(slug: Slug, supabase: "Client" = Depends(get_supabase)):
     """
     Get information about a demo.
 
@@ -122,12 +144,12 @@ async def get_demo_info(slug: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error fetching demo info: {e}")
+        logger.exception("❌ Error fetching demo info: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/demo/{slug}/status")
-async def get_demo_status(slug: str):
+async def get_demo_status(slug: Slug, supabase: "Client" = Depends(get_supabase)):
     """
     Quick status check for a demo.
 
@@ -160,12 +182,16 @@ async def get_demo_status(slug: str):
         }
 
     except Exception as e:
-        print(f"❌ Error checking demo status: {e}")
+        logger.exception("❌ Error checking demo status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/demos")
-async def list_demos(limit: int = 10, status: Optional[str] = None):
+async def list_demos(
+    limit: int = 10,
+    status: Optional[str] = None,
+    supabase: "Client" = Depends(get_supabase)
+):
     """
     List all demos.
 
@@ -190,5 +216,5 @@ async def list_demos(limit: int = 10, status: Optional[str] = None):
         }
 
     except Exception as e:
-        print(f"❌ Error listing demos: {e}")
+        logger.exception("❌ Error listing demos: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
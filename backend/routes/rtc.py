@@ -0,0 +1,101 @@
+"""
+WebRTC Voice Routes
+Signaling for browser demo calls over WebRTC
+Phone calls (PSTN) keep using the Twilio Media Streams path in routes/voice.py
+"""
+import asyncio
+import logging
+import uuid
+from typing import Optional, TYPE_CHECKING
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, ConfigDict, Field
+
+from services import course_cache, insert_batcher
+from routes.chat import demo_limit_error, reserve_demo_turn
+from routes.voice import stream_agent_sentences
+from db import get_supabase
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class RTCOffer(BaseModel):
+    """Session description offered by the browser"""
+    sdp: str = Field(..., description="Offer SDP")
+    type: str = Field("offer", pattern="^offer$", description="SDP type")
+    demo_slug: str = Field(..., pattern=r"^[a-z0-9-]{1,128}$", description="Demo course to call")
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class RTCAnswer(BaseModel):
+    """Session description answered by the server"""
+    sdp: str
+    type: str
+
+    model_config = ConfigDict(defer_build=True)
+
+
+@router.post("/rtc/offer", response_model=RTCAnswer)
+async def handle_rtc_offer(
+    offer: RTCOffer,
+    supabase: "Client" = Depends(get_supabase)
+):
+    """
+    Start a browser voice call with a demo agent.
+
+    The browser posts its SDP offer and gets the answer back; audio then
+    flows over UDP (Opus) straight into Deepgram and back from ElevenLabs.
+    """
+    try:
+        # aiortc and LangChain are loaded on the first call, not at app startup
+        from services.rtc import answer_offer
+        from services.agent import create_demo_agent
+    except ImportError:
+        raise HTTPException(status_code=503, detail="WebRTC calls are not available")
+
+    demo_course = await asyncio.to_thread(course_cache.get_demo_course, supabase, offer.demo_slug)
+    if not demo_course:
+        raise HTTPException(status_code=404, detail="Demo not found")
+
+    # Don't open a call the demo has no interactions left for
+    if demo_course['interaction_count'] >= demo_course['interaction_limit']:
+        raise demo_limit_error(demo_course['interaction_limit'])
+
+    session_id = f"rtc-{uuid.uuid4()}"
+    agent = await asyncio.to_thread(create_demo_agent, demo_course)
+    greeting = f"Thank you for calling {demo_course['name']}. How can I help you today?"
+
+    async def reserve_turn() -> Optional[str]:
+        """Claim one demo interaction per turn (None once the limit is reached)"""
+        try:
+            return await reserve_demo_turn(supabase, offer.demo_slug, session_id, channel='voice')
+        except HTTPException:
+            return None
+
+    def record_turn(interaction_id: str, user_message: str, agent_response: str):
+        """Fill in the reserved interaction's transcript (batched)"""
+        insert_batcher.enqueue({
+            'id': interaction_id,
+            'demo_course_id': demo_course['id'],
+            'channel': 'voice',
+            'session_id': session_id,
+            'user_message': user_message,
+            'agent_response': agent_response
+        })
+
+    logger.info("📞 WebRTC call started: %s (%s)", session_id, offer.demo_slug)
+    answer = await answer_offer(
+        offer.sdp,
+        offer.type,
+        session_id,
+        lambda transcript: stream_agent_sentences(agent, transcript),
+        greeting,
+        reserve_turn,
+        record_turn
+    )
+
+    return RTCAnswer(**answer)
@@ -3,49 +3,121 @@ Voice Pipeline Routes
 WebSocket handler for Twilio Media Streams
 Real-time bidirectional audio streaming
 """
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Optional
-import json
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from typing import AsyncIterator, Dict, Optional, TYPE_CHECKING
+import orjson
 import asyncio
-import base64
+import logging
+import random
+import re
+from collections import deque
 from datetime import datetime
+from cachetools import LRUCache
+import pybase64
 
 from services.voice import (
-    decode_audio_from_twilio,
-    encode_audio_for_twilio,
     initialize_deepgram_stream,
-    text_to_speech_for_twilio,
+    phrase_to_speech_for_twilio,
+    stream_phrase_to_speech_for_twilio,
+    stream_text_input_to_speech_for_twilio,
     stream_audio_to_twilio_websocket,
-    mulaw_to_pcm
+    twilio_media_prefix,
+    twilio_clear_message,
+    TWILIO_SAMPLE_RATE
 )
-from services.agent import create_demo_agent, create_production_agent
 from services.memory import (
-    identify_or_create_caller,
-    get_recent_conversations,
-    store_conversation,
-    build_context_string
-)
-from supabase import create_client
-from config.settings import (
-    SUPABASE_URL,
-    SUPABASE_SERVICE_ROLE_KEY,
-    DEEPGRAM_API_KEY,
-    ELEVENLABS_API_KEY,
-    ELEVENLABS_VOICE_ID
+    identify_caller_with_history,
+    store_conversation_in_background
 )
+from routes.chat import chunk_text
+from db import get_supabase
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Bounds for leaked or runaway calls (far beyond normal load)
+MAX_ACTIVE_CALLS = 10_000
+MAX_TRANSCRIPT_LINES = 512
+
+# Utterances waiting for the agent; more than this and new ones are dropped
+MAX_PENDING_UTTERANCES = 4
+
+
+class CallSessions(LRUCache):
+    """Call sessions, evicting the oldest (and closing its Deepgram stream) when full"""
+
+    def popitem(self):
+        call_sid, session = super().popitem()
+        logger.warning("⚠️ Too many active calls, evicting session %s", call_sid)
+
+        session['agent_worker'].cancel()
+        deepgram_ws = session.get('deepgram_ws')
+        if deepgram_ws:
+            asyncio.create_task(deepgram_ws.finish())
+
+        return call_sid, session
 
-# Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 # Active call sessions
 # Maps call_sid -> session data
-active_calls: Dict[str, Dict] = {}
+active_calls: CallSessions = CallSessions(maxsize=MAX_ACTIVE_CALLS)
+
+# Played at the start of every call (synthesized once, then cached)
+WELCOME_TEXT = "Thank you for calling Fox Hollow Golf Course. How can I help you today?"
+
+# Said when a reply's first audio is slow (long generation, slow TTS), so the
+# caller doesn't hear dead air. Synthesized at startup like the welcome.
+FILLER_PHRASES = ("One moment.", "Let me check that for you.", "Sure, just a second.")
+FILLER_DELAY_SECONDS = 1.2
+
+# Where the agent's streamed reply is cut into sentences for TTS
+# (not after abbreviations like "St.", "Mrs.", "J." or "a.m.")
+SENTENCE_BOUNDARY = re.compile(
+    r'(?<!\b[A-Z][a-z]\.)(?<!\bMrs\.)(?<!\b[A-Z]\.)(?<!\b[a-z]\.[a-z]\.)(?<=[.!?])\s+|\n+'
+)
+
+# Interim words from the caller while the agent is talking stop the reply.
+# One word is often noise or a backchannel ("mm-hmm"), so it takes two.
+BARGE_IN_MIN_WORDS = 2
+
+# Shorter sentences ("Sure!") are sent together with the next one, since
+# ElevenLabs prosody suffers on tiny fragments
+MIN_SENTENCE_CHARS = 10
+
+# Inbound audio is coalesced into ~80ms chunks (4 Twilio frames) per Deepgram send
+DEEPGRAM_BATCH_MS = 80
+DEEPGRAM_BATCH_BYTES = TWILIO_SAMPLE_RATE * DEEPGRAM_BATCH_MS // 1000  # 1 byte per μ-law sample
+
+# Fixed per-call audio buffer: one batch plus headroom for an oversized frame
+AUDIO_BATCH_CAPACITY = 2 * DEEPGRAM_BATCH_BYTES
+
+
+async def iter_frames(websocket: WebSocket):
+    """
+    Yield raw WebSocket frame payloads as the server delivered them.
+
+    Unlike iter_text/iter_bytes this accepts either frame type (Twilio sends
+    text), so payloads go straight to orjson without a type-specific receive.
+    Raises WebSocketDisconnect when the client goes away.
+    """
+    while True:
+        message = await websocket.receive()
+
+        if message['type'] == 'websocket.disconnect':
+            raise WebSocketDisconnect(message.get('code', 1000))
+
+        payload = message.get('bytes')
+        yield payload if payload is not None else message['text']
 
 
 @router.websocket("/media-stream")
-async def media_stream_handler(websocket: WebSocket):
+async def media_stream_handler(
+    websocket: WebSocket,
+    supabase: "Client" = Depends(get_supabase)
+):
     """
     Handle Twilio Media Stream WebSocket connection.
 
@@ -57,191 +129,350 @@ async def media_stream_handler(websocket: WebSocket):
     5. Audio → Twilio (outgoing to caller)
     """
     await websocket.accept()
-    print("📞 WebSocket connection accepted")
+    logger.info("📞 WebSocket connection accepted")
 
     stream_sid = None
     call_sid = None
+    session = None
     deepgram_ws = None
-    transcript_buffer = []
 
     try:
-        async for message in websocket.iter_text():
-            data = json.loads(message)
+        async for message in iter_frames(websocket):
+            # Fast path: inbound audio (~50 frames/sec) skips the JSON parse
+            payload = inbound_media_payload(message)
+            if payload is not None:
+                if session is not None and deepgram_ws:
+                    await forward_inbound_audio(session, deepgram_ws, payload)
+                continue
+
+            data = orjson.loads(message)
             event = data.get('event')
 
             if event == 'start':
                 # ============================================================
                 # CALL START - Initialize everything
                 # ============================================================
+                # LangChain is imported on the first call, not at app startup
+                from services.agent import create_demo_agent
+
                 stream_sid = data['streamSid']
                 call_sid = data['start']['callSid']
                 from_number = data['start'].get('customParameters', {}).get('From', 'unknown')
 
-                print(f"📞 Call started: {call_sid}")
-                print(f"   From: {from_number}")
-                print(f"   Stream: {stream_sid}")
+                logger.info("📞 Call started: %s (from %s, stream %s)", call_sid, from_number, stream_sid)
 
                 # Initialize caller identity and memory
                 # For demo: Use Fox Hollow as default golf course
                 golf_course_id = "demo-fox-hollow"
 
-                try:
-                    # Identify or create caller
-                    caller = identify_or_create_caller(supabase, from_number, golf_course_id)
-
-                    # Get conversation history
-                    recent_conversations = get_recent_conversations(supabase, caller['id'], limit=3)
-                    history_context = build_context_string(recent_conversations)
-
-                    # Create agent with context
-                    # For demo, we'll use a simplified golf course dict
-                    demo_golf_course = {
-                        'name': 'Fox Hollow Golf Course',
-                        'location': 'Troy, Michigan',
-                        'phone_number': '+12272334997'
-                    }
-
-                    agent = create_demo_agent(demo_golf_course)
-
-                    print(f"✅ Agent initialized for caller {caller['id']}")
+                # For demo, we'll use a simplified golf course dict
+                demo_golf_course = {
+                    'name': 'Fox Hollow Golf Course',
+                    'location': 'Troy, Michigan',
+                    'phone_number': '+12272334997'
+                }
 
-                except Exception as e:
-                    print(f"⚠️ Error initializing caller/agent: {e}")
-                    # Create fallback agent
-                    demo_golf_course = {
-                        'name': 'Fox Hollow Golf Course',
-                        'location': 'Troy, Michigan'
-                    }
-                    agent = create_demo_agent(demo_golf_course)
+                # Caller lookup (one RPC, with history) and agent setup don't depend
+                # on each other, so run them concurrently and off the event loop
+                caller_context, agent = await asyncio.gather(
+                    asyncio.to_thread(
+                        identify_caller_with_history, supabase, from_number, golf_course_id, 3
+                    ),
+                    asyncio.to_thread(create_demo_agent, demo_golf_course),
+                    return_exceptions=True
+                )
+
+                if isinstance(agent, Exception):
+                    raise agent
+
+                if isinstance(caller_context, Exception):
+                    logger.warning("⚠️ Error identifying caller: %s", caller_context)
                     caller = {'id': 'demo-caller', 'phone_number': from_number}
+                else:
+                    caller, _ = caller_context
+                    logger.info("✅ Agent initialized for caller %s", caller['id'])
 
                 # Initialize call session
-                active_calls[call_sid] = {
+                # Bound to a local so per-frame handling never looks up active_calls
+                session = active_calls[call_sid] = {
+                    'call_sid': call_sid,
                     'stream_sid': stream_sid,
+                    'tx_prefix': twilio_media_prefix(stream_sid),  # Outbound media JSON up to the payload
                     'from_number': from_number,
                     'caller': caller,
                     'golf_course_id': golf_course_id,
                     'start_time': datetime.now(),
-                    'transcript': [],
+                    'transcript': deque(maxlen=MAX_TRANSCRIPT_LINES),
                     'agent': agent,
-                    'transcript_buffer': [],
-                    'is_processing': False  # Prevent overlapping agent responses
+                    'transcript_buffer': deque(maxlen=MAX_TRANSCRIPT_LINES),
+                    'deepgram_ws': None,
+                    # Final transcripts, answered one at a time by agent_worker
+                    'utterances': asyncio.Queue(maxsize=MAX_PENDING_UTTERANCES),
+                    # μ-law waiting to be sent to Deepgram - allocated once, never grows
+                    'audio_batch': bytearray(AUDIO_BATCH_CAPACITY),
+                    'audio_batch_len': 0,
+                    'flush_timer': None,
+                    'tx_lock': asyncio.Lock(),  # Keeps outbound utterances from interleaving
+                    'response': None  # Reply being generated/spoken (cancelled on barge-in)
                 }
+                session['agent_worker'] = asyncio.create_task(agent_worker(websocket, session))
 
                 # Define transcript callback for Deepgram
-                def on_transcript(transcript: str, is_final: bool):
-                    """Handle transcripts from Deepgram"""
-                    if is_final and transcript.strip():
-                        # Queue for agent processing
-                        active_calls[call_sid]['transcript_buffer'].append(transcript)
-
-                        # Process immediately
-                        asyncio.create_task(
-                            process_agent_response(websocket, stream_sid, call_sid, transcript)
-                        )
+                def on_transcript(transcript: str, is_final: bool, session=session):
+                    """Handle transcripts from Deepgram (called on the event loop)"""
+                    if not is_final:
+                        # Caller is talking over the agent - stop the reply
+                        if len(transcript.split()) >= BARGE_IN_MIN_WORDS:
+                            interrupt_agent(session)
+                        return
+
+                    if transcript.strip():
+                        session['transcript_buffer'].append(transcript)
+
+                        # Queue for agent processing (drop if the caller is far ahead)
+                        try:
+                            session['utterances'].put_nowait(transcript)
+                        except asyncio.QueueFull:
+                            logger.warning("⚠️ Agent busy, dropping utterance: %s", transcript[:50])
 
                 # Initialize Deepgram WebSocket
                 try:
-                    deepgram_ws = await initialize_deepgram_stream(call_sid, on_transcript)
-                    print(f"✅ Deepgram initialized for {call_sid}")
+                    # Deepgram takes Twilio's μ-law as-is - no conversion per frame
+                    deepgram_ws = await initialize_deepgram_stream(
+                        call_sid,
+                        on_transcript,
+                        encoding="mulaw",
+                        sample_rate=TWILIO_SAMPLE_RATE,
+                        channels=1
+                    )
+                    session['deepgram_ws'] = deepgram_ws
+                    logger.info("✅ Deepgram initialized for %s", call_sid)
                 except Exception as e:
-                    print(f"❌ Failed to initialize Deepgram: {e}")
+                    logger.error("❌ Failed to initialize Deepgram: %s", e)
                     # Continue without STT (will fail but connection stays open)
 
-                # Send welcome message
+                # Send welcome message (cached audio - no TTS round trip)
                 try:
-                    welcome_text = "Thank you for calling Fox Hollow Golf Course. How can I help you today?"
-                    await send_agent_response(websocket, stream_sid, call_sid, welcome_text)
+                    welcome_audio = await phrase_to_speech_for_twilio(WELCOME_TEXT)
+                    async with session['tx_lock']:
+                        await stream_audio_to_twilio_websocket(
+                            websocket,
+                            stream_sid,
+                            welcome_audio,
+                            message_prefix=session['tx_prefix'],
+                            ramp_up=True
+                        )
                 except Exception as e:
-                    print(f"⚠️ Error sending welcome message: {e}")
+                    logger.warning("⚠️ Error sending welcome message: %s", e)
 
             elif event == 'media':
                 # ============================================================
                 # INCOMING AUDIO - Forward to Deepgram
                 # ============================================================
-                if call_sid not in active_calls:
+                # (Only frames the fast path didn't recognize get here)
+                if session is None:
                     continue
 
-                if data['media'].get('track') == 'inbound':
-                    payload = data['media']['payload']
-
-                    # Decode base64 μ-law audio from Twilio
-                    mulaw_data = base64.b64decode(payload)
-
-                    # Convert μ-law (8kHz) to PCM (16kHz) for Deepgram
-                    pcm_audio = mulaw_to_pcm(mulaw_data)
-
-                    # Send to Deepgram for transcription
-                    if deepgram_ws:
-                        try:
-                            await deepgram_ws.send(pcm_audio)
-                        except Exception as e:
-                            print(f"⚠️ Error sending audio to Deepgram: {e}")
+                if data['media'].get('track') == 'inbound' and deepgram_ws:
+                    await forward_inbound_audio(session, deepgram_ws, data['media']['payload'])
 
             elif event == 'stop':
                 # ============================================================
                 # CALL END - Store conversation and cleanup
                 # ============================================================
-                print(f"📞 Call ended: {call_sid}")
-
-                if call_sid in active_calls:
-                    session = active_calls[call_sid]
+                logger.info("📞 Call ended: %s", call_sid)
 
+                if session is not None:
                     # Build full transcript
                     transcript_text = "\n".join(session['transcript'])
 
                     # Calculate duration
                     duration = int((datetime.now() - session['start_time']).total_seconds())
 
-                    # Store conversation in database
-                    try:
-                        store_conversation(
-                            supabase=supabase,
-                            caller_id=session['caller']['id'],
-                            golf_course_id=session['golf_course_id'],
-                            transcript=transcript_text,
-                            channel='voice',
-                            duration_seconds=duration
-                        )
-                        print(f"✅ Conversation stored for {call_sid}")
-                    except Exception as e:
-                        print(f"⚠️ Error storing conversation: {e}")
-                        print(f"📝 Call transcript:\n{transcript_text}")
+                    # Store conversation in database (in the background - the
+                    # caller is gone, so teardown doesn't wait on embedding + insert)
+                    store_conversation_in_background(
+                        supabase,
+                        caller_id=session['caller']['id'],
+                        golf_course_id=session['golf_course_id'],
+                        transcript=transcript_text,
+                        channel='voice',
+                        duration_seconds=duration
+                    )
 
                     # Close Deepgram connection
                     if deepgram_ws:
                         try:
+                            await flush_audio_to_deepgram(session, deepgram_ws)
                             await deepgram_ws.finish()
-                        except:
+                        except Exception:
                             pass
 
                     # Cleanup session
-                    del active_calls[call_sid]
+                    session['agent_worker'].cancel()
+                    active_calls.pop(call_sid, None)
+                    session = None
 
             elif event == 'mark':
                 # Twilio confirmation marker (can ignore)
                 pass
 
     except WebSocketDisconnect:
-        print(f"📞 WebSocket disconnected: {call_sid}")
+        logger.info("📞 WebSocket disconnected: %s", call_sid)
         if deepgram_ws:
             try:
                 await deepgram_ws.finish()
-            except:
+            except Exception:
                 pass
-        if call_sid and call_sid in active_calls:
-            del active_calls[call_sid]
+        if session is not None:
+            session['agent_worker'].cancel()
+        if call_sid:
+            active_calls.pop(call_sid, None)
+
+    except Exception as e:
+        logger.exception("❌ Error in media stream: %s", e)
+
+
+# Twilio serializes every media message with these keys, in this order
+MEDIA_EVENT_PREFIX = '{"event":"media"'
+INBOUND_TRACK = '"track":"inbound"'
+PAYLOAD_KEY = '"payload":"'
+
+
+def inbound_media_payload(message) -> Optional[str]:
+    """
+    Pull the base64 payload out of an inbound media frame without parsing JSON.
+
+    Args:
+        message: Raw WebSocket frame
+
+    Returns:
+        Base64 payload, or None if this isn't an inbound media frame in
+        Twilio's usual shape (the caller then parses it normally)
+    """
+    if not isinstance(message, str) or not message.startswith(MEDIA_EVENT_PREFIX):
+        return None
+    if INBOUND_TRACK not in message:
+        return None
+
+    start = message.find(PAYLOAD_KEY)
+    if start < 0:
+        return None
+    start += len(PAYLOAD_KEY)
+
+    end = message.find('"', start)
+    if end < 0:
+        return None
 
+    return message[start:end]
+
+
+async def forward_inbound_audio(session: Dict, deepgram_ws, payload: str):
+    """
+    Decode one inbound Twilio frame and batch it (still μ-law) for Deepgram.
+
+    Args:
+        session: Call session (from active_calls)
+        deepgram_ws: Deepgram connection for the call
+        payload: Base64 μ-law audio from the media message
+    """
+    # Decode base64 μ-law audio from Twilio
+    # (Twilio frames are 20ms; anything over the buffer is cut)
+    mulaw_data = pybase64.b64decode(payload, validate=False)[:AUDIO_BATCH_CAPACITY]
+
+    # Flush first if this frame wouldn't fit
+    if session['audio_batch_len'] + len(mulaw_data) > AUDIO_BATCH_CAPACITY:
+        await flush_audio_to_deepgram(session, deepgram_ws)
+
+    # Copy into the batch in place (same-size slice assignment never reallocates)
+    batch_len = session['audio_batch_len']
+    session['audio_batch'][batch_len:batch_len + len(mulaw_data)] = mulaw_data
+    session['audio_batch_len'] = batch_len + len(mulaw_data)
+
+    # Send to Deepgram for transcription, a batch at a time
+    if session['audio_batch_len'] >= DEEPGRAM_BATCH_BYTES:
+        await flush_audio_to_deepgram(session, deepgram_ws)
+    elif session['flush_timer'] is None:
+        # Don't hold a partial batch if the caller's audio stops
+        session['flush_timer'] = asyncio.get_running_loop().call_later(
+            DEEPGRAM_BATCH_MS / 1000,
+            lambda: asyncio.create_task(flush_audio_to_deepgram(session, deepgram_ws))
+        )
+
+
+async def flush_audio_to_deepgram(session: Dict, deepgram_ws):
+    """
+    Send the call's batched audio to Deepgram in one WebSocket message.
+
+    Args:
+        session: Call session (from active_calls)
+        deepgram_ws: Deepgram connection for the call
+    """
+    if session['flush_timer'] is not None:
+        session['flush_timer'].cancel()
+        session['flush_timer'] = None
+
+    if not session['audio_batch_len']:
+        return
+
+    chunk = bytes(memoryview(session['audio_batch'])[:session['audio_batch_len']])
+    session['audio_batch_len'] = 0
+
+    try:
+        await deepgram_ws.send(chunk)
     except Exception as e:
-        print(f"❌ Error in media stream: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.warning("⚠️ Error sending audio to Deepgram: %s", e)
+
+
+async def agent_worker(websocket: WebSocket, session: Dict):
+    """Answer the call's queued utterances in order, one at a time (runs for the whole call)"""
+    # Words from an interrupted turn (it never reached the agent's memory)
+    carryover = ""
+
+    while True:
+        user_message = await session['utterances'].get()
+        if carryover:
+            user_message = f"{carryover} {user_message}"
+            carryover = ""
+
+        response = session['response'] = asyncio.create_task(
+            process_agent_response(websocket, session, user_message)
+        )
+        try:
+            await response
+        except asyncio.CancelledError:
+            # The worker itself is being cancelled (call ended)
+            if asyncio.current_task().cancelling():
+                raise
+
+            # Barge-in: drop whatever Twilio still has buffered too
+            logger.info("✋ [%s] Caller interrupted the agent", session['call_sid'])
+            carryover = user_message
+            try:
+                await websocket.send_text(twilio_clear_message(session['stream_sid']))
+            except Exception as e:
+                logger.warning("⚠️ Error clearing Twilio audio: %s", e)
+        finally:
+            session['response'] = None
+
+
+def interrupt_agent(session: Dict):
+    """
+    Cancel the agent's reply if it's being spoken (caller barged in).
+
+    Called from the Deepgram transcript callback, which runs on the event
+    loop - Task.cancel and the lock check aren't safe from other threads.
+    """
+    response = session['response']
+
+    # tx_lock is held while the reply is generated and spoken
+    if response is not None and not response.done() and session['tx_lock'].locked():
+        response.cancel()
 
 
 async def process_agent_response(
     websocket: WebSocket,
-    stream_sid: str,
-    call_sid: str,
+    session: Dict,
     user_message: str
 ):
     """
@@ -249,56 +480,119 @@ async def process_agent_response(
 
     Args:
         websocket: Twilio WebSocket connection
-        stream_sid: Twilio stream ID
-        call_sid: Call session ID
+        session: Call session (from active_calls)
         user_message: Transcribed user message
     """
-    if call_sid not in active_calls:
-        return
-
-    session = active_calls[call_sid]
-
-    # Prevent overlapping responses
-    if session.get('is_processing', False):
-        print(f"⚠️ Already processing a response, queuing: {user_message[:50]}")
-        return
-
-    session['is_processing'] = True
+    call_sid = session['call_sid']
 
     try:
-        print(f"👤 [{call_sid}] User: {user_message}")
+        logger.info("👤 [%s] User: %s", call_sid, user_message)
         session['transcript'].append(f"Customer: {user_message}")
 
-        # Get agent response
-        agent = session['agent']
-        agent_response = agent.run(user_message)
+        reply = []
 
-        print(f"🤖 [{call_sid}] Agent: {agent_response}")
-        session['transcript'].append(f"Agent: {agent_response}")
+        async def sentences():
+            async for sentence in stream_agent_sentences(session['agent'], user_message):
+                reply.append(sentence)
+                yield sentence
 
-        # Send response to caller
-        await send_agent_response(websocket, stream_sid, call_sid, agent_response)
+        # Each sentence goes to ElevenLabs as soon as the LLM finishes it, and
+        # audio is forwarded as it comes back (one TTS connection per turn)
+        async with session['tx_lock']:
+            filler_playing = asyncio.Event()
+            filler = asyncio.create_task(play_filler(websocket, session, filler_playing))
+            try:
+                first_audio = True
+                async for audio_mulaw in stream_text_input_to_speech_for_twilio(sentences()):
+                    if not filler.done():
+                        # Reply audio is ready: skip the filler, or let it finish
+                        # if it has started (never cut it off mid-word)
+                        if not filler_playing.is_set():
+                            filler.cancel()
+                        await asyncio.gather(filler, return_exceptions=True)
+
+                    await stream_audio_to_twilio_websocket(
+                        websocket,
+                        session['stream_sid'],
+                        audio_mulaw,
+                        message_prefix=session['tx_prefix'],
+                        ramp_up=first_audio
+                    )
+                    first_audio = False
+            finally:
+                filler.cancel()
+
+        agent_response = " ".join(reply)
+        logger.info("🤖 [%s] Agent: %s", call_sid, agent_response)
+        session['transcript'].append(f"Agent: {agent_response}")
 
     except Exception as e:
-        print(f"❌ Error processing agent response: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error processing agent response: %s", e)
 
         # Send fallback response
         try:
             fallback = "I'm sorry, I didn't catch that. Could you please repeat?"
-            await send_agent_response(websocket, stream_sid, call_sid, fallback)
-        except:
+            await send_agent_response(websocket, session, fallback)
+        except Exception:
             pass
 
-    finally:
-        session['is_processing'] = False
+
+async def play_filler(websocket: WebSocket, session: Dict, playing: asyncio.Event):
+    """
+    Say a filler phrase if the reply has no audio after FILLER_DELAY_SECONDS.
+
+    Args:
+        websocket: Twilio WebSocket connection
+        session: Call session (from active_calls)
+        playing: Set once the filler starts, after which it isn't cancelled
+    """
+    await asyncio.sleep(FILLER_DELAY_SECONDS)
+
+    filler_audio = await phrase_to_speech_for_twilio(random.choice(FILLER_PHRASES))
+    playing.set()
+
+    await stream_audio_to_twilio_websocket(
+        websocket,
+        session['stream_sid'],
+        filler_audio,
+        message_prefix=session['tx_prefix'],
+        ramp_up=True
+    )
+
+
+async def stream_agent_sentences(agent, user_message: str) -> AsyncIterator[str]:
+    """
+    Run one agent turn, yielding the reply a sentence at a time.
+
+    Args:
+        agent: Call agent
+        user_message: Transcribed user message
+
+    Yields:
+        Complete sentences, as soon as the LLM has generated them
+    """
+    buffer = ""
+    async for event in agent.astream_events({"input": user_message}, version="v2"):
+        if event['event'] != 'on_chat_model_stream':
+            continue
+
+        buffer += chunk_text(event['data']['chunk'])
+
+        start = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(buffer):
+            sentence = buffer[start:boundary.start()].strip()
+            if len(sentence) >= MIN_SENTENCE_CHARS:
+                yield sentence
+                start = boundary.end()
+        buffer = buffer[start:]
+
+    if buffer.strip():
+        yield buffer.strip()
 
 
 async def send_agent_response(
     websocket: WebSocket,
-    stream_sid: str,
-    call_sid: str,
+    session: Dict,
     text: str
 ):
     """
@@ -306,25 +600,32 @@ async def send_agent_response(
 
     Args:
         websocket: Twilio WebSocket connection
-        stream_sid: Twilio stream ID
-        call_sid: Call session ID
+        session: Call session (from active_calls)
         text: Text to speak
     """
-    try:
-        print(f"🔊 [{call_sid}] Sending TTS: {text[:50]}...")
+    call_sid = session['call_sid']
 
-        # Convert text to speech (returns μ-law audio for Twilio)
-        audio_mulaw = await text_to_speech_for_twilio(text)
-
-        # Stream audio to Twilio
-        await stream_audio_to_twilio_websocket(websocket, stream_sid, audio_mulaw)
-
-        print(f"✅ [{call_sid}] TTS sent successfully")
+    try:
+        logger.info("🔊 [%s] Sending TTS: %s...", call_sid, text[:50])
+
+        # Stream μ-law audio to Twilio as ElevenLabs generates it
+        # (cached for repeated phrases)
+        async with session['tx_lock']:
+            first_audio = True
+            async for audio_mulaw in stream_phrase_to_speech_for_twilio(text):
+                await stream_audio_to_twilio_websocket(
+                    websocket,
+                    session['stream_sid'],
+                    audio_mulaw,
+                    message_prefix=session['tx_prefix'],
+                    ramp_up=first_audio
+                )
+                first_audio = False
+
+        logger.info("✅ [%s] TTS sent successfully", call_sid)
 
     except Exception as e:
-        print(f"❌ Error sending TTS: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error sending TTS: %s", e)
 
 
 
@@ -353,7 +654,7 @@ async def handle_incoming_call(
     base_url = os.getenv("BASE_URL", "wss://localhost:8000")
 
     # Log incoming call
-    print(f"📞 Incoming call from {From} to {To} (CallSid: {CallSid})")
+    logger.info("📞 Incoming call from %s to %s (CallSid: %s)", From, To, CallSid)
 
     # Build TwiML with Media Stream
     twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -2,12 +2,25 @@
 LangChain Agent - AI conversation handler
 Uses Claude Sonnet 4.5 with conversation memory
 """
-from typing import Dict, Optional
+import logging
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+from cachetools import LRUCache
 from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage, SystemMessage, get_buffer_string
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.chains import ConversationChain
-from langchain.memory import ConversationBufferMemory
-from config.settings import ANTHROPIC_API_KEY
+from langchain.memory import ConversationSummaryBufferMemory
+from config.settings import ANTHROPIC_API_KEY, MEMORY_MAX_TOKEN_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Cheap model that condenses older turns once history passes MEMORY_MAX_TOKEN_LIMIT
+SUMMARIZER_MODEL = "claude-haiku-4-5-20251001"
+
+# Maps (course id, updated_at) -> course block of the production prompt.
+# updated_at is bumped by a trigger on every edit, so stale entries are never hit.
+_course_prompts: LRUCache = LRUCache(maxsize=512)
 
 
 def build_production_agent_prompt(
@@ -26,6 +39,40 @@ def build_production_agent_prompt(
     Returns:
         Complete system prompt string
     """
+    return get_course_prompt(golf_course) + "\n\n" + build_caller_prompt(caller, conversation_history)
+
+
+def get_course_prompt(golf_course: Dict) -> str:
+    """
+    Get the course block of the production prompt, from cache when possible.
+
+    Args:
+        golf_course: Golf course data from database
+
+    Returns:
+        Course information and instructions
+    """
+    key = (golf_course.get('id'), golf_course.get('updated_at'))
+    if key[0] is None:
+        return build_course_prompt(golf_course)
+
+    prompt = _course_prompts.get(key)
+    if prompt is None:
+        prompt = _course_prompts[key] = build_course_prompt(golf_course)
+
+    return prompt
+
+
+def build_course_prompt(golf_course: Dict) -> str:
+    """
+    Build the part of the production prompt that is the same for every caller.
+
+    Args:
+        golf_course: Golf course data from database
+
+    Returns:
+        Course information and instructions
+    """
     prompt = f"""You are the AI receptionist for {golf_course['name']}, located in {golf_course.get('location', 'our location')}.
 
 Your role is to assist callers with:
@@ -47,7 +94,7 @@ Your role is to assist callers with:
 {format_pricing(golf_course.get('pricing', {}))}
 
 **Amenities:**
-{', '.join(golf_course.get('amenities', []))}
+{', '.join(sorted(golf_course.get('amenities', [])))}
 
 **Policies:**
 {format_policies(golf_course.get('policies', {}))}
@@ -55,14 +102,6 @@ Your role is to assist callers with:
 **Special Notes:**
 {golf_course.get('special_notes', 'None')}
 
-**Caller Information:**
-- Phone: {caller.get('phone_number', 'Unknown')}
-- Name: {caller.get('first_name', '')} {caller.get('last_name', '')}
-- Total Previous Calls: {caller.get('total_conversations', 0)}
-
-**Conversation History:**
-{conversation_history}
-
 **Instructions:**
 1. Be warm, professional, and helpful
 2. Reference previous conversations naturally when relevant
@@ -77,6 +116,26 @@ Your role is to assist callers with:
     return prompt
 
 
+def build_caller_prompt(caller: Dict, conversation_history: str) -> str:
+    """
+    Build the caller-specific part of the production prompt.
+
+    Args:
+        caller: Caller data from database
+        conversation_history: Formatted string of recent conversations
+
+    Returns:
+        Caller information and conversation history
+    """
+    return f"""**Caller Information:**
+- Phone: {caller.get('phone_number', 'Unknown')}
+- Name: {caller.get('first_name', '')} {caller.get('last_name', '')}
+- Total Previous Calls: {caller.get('total_conversations', 0)}
+
+**Conversation History:**
+{conversation_history}"""
+
+
 def build_demo_agent_prompt(demo_course: Dict) -> str:
     """
     Build system prompt for demo mode agent.
@@ -87,6 +146,19 @@ def build_demo_agent_prompt(demo_course: Dict) -> str:
     Returns:
         Complete system prompt string
     """
+    return build_demo_course_prompt(demo_course) + "\n\n" + build_demo_usage_prompt(demo_course)
+
+
+def build_demo_course_prompt(demo_course: Dict) -> str:
+    """
+    Build the part of the demo prompt that only changes when the demo is regenerated.
+
+    Args:
+        demo_course: Demo course data from database
+
+    Returns:
+        Course information and demo instructions
+    """
     scraped_data = demo_course.get('scraped_data', {})
     ai_data = demo_course.get('ai_processed_data', {})
 
@@ -109,12 +181,37 @@ This is a DEMONSTRATION to show the capabilities of ProShop 24/7 AI voice agents
 4. Keep responses natural and conversational
 5. After 3-4 exchanges, suggest: "Would you like to see how I handle bookings?" or similar
 
-**Remember:** This is a demonstration. Be helpful but also showcase the technology!
+**Remember:** This is a demonstration. Be helpful but also showcase the technology!"""
+
+    return prompt
+
 
-**Interaction Count:** {demo_course.get('interaction_count', 0)} / {demo_course.get('interaction_limit', 25)}
+def build_demo_usage_prompt(demo_course: Dict) -> str:
+    """Build the interaction-count part of the demo prompt (changes every turn)"""
+    return f"""**Interaction Count:** {demo_course.get('interaction_count', 0)} / {demo_course.get('interaction_limit', 25)}
 {get_demo_limit_message(demo_course)}"""
 
-    return prompt
+
+def build_system_message(static_prompt: str, dynamic_prompt: str) -> SystemMessage:
+    """
+    Build a system message whose static part is cached by Anthropic.
+
+    The static block carries a prompt-caching breakpoint, so turn 2+ of a
+    conversation (and other sessions for the same course) reuse it at a
+    fraction of the input cost and latency. Anything that varies per
+    caller or per turn goes in the block after it.
+
+    Args:
+        static_prompt: Prompt text shared across sessions (course info, instructions)
+        dynamic_prompt: Prompt text specific to this session
+
+    Returns:
+        System message with content blocks
+    """
+    return SystemMessage(content=[
+        {"type": "text", "text": static_prompt, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": dynamic_prompt}
+    ])
 
 
 def create_production_agent(
@@ -133,9 +230,10 @@ def create_production_agent(
     Returns:
         Configured ConversationChain
     """
-    # Build system prompt
-    system_prompt = build_production_agent_prompt(
-        golf_course, caller, conversation_history
+    # Build system prompt (course block cached, caller block after it)
+    system_message = build_system_message(
+        get_course_prompt(golf_course),
+        build_caller_prompt(caller, conversation_history)
     )
 
     # Initialize Claude Sonnet 4.5
@@ -149,16 +247,13 @@ def create_production_agent(
 
     # Create prompt template
     prompt_template = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        system_message,
         MessagesPlaceholder(variable_name="history"),
         ("human", "{input}")
     ])
 
     # Create conversation memory
-    memory = ConversationBufferMemory(
-        memory_key="history",
-        return_messages=True
-    )
+    memory = create_memory()
 
     # Create chain
     chain = ConversationChain(
@@ -168,7 +263,7 @@ def create_production_agent(
         verbose=False
     )
 
-    print(f"🤖 Production agent created for {golf_course['name']}")
+    logger.info("🤖 Production agent created for %s", golf_course['name'])
     return chain
 
 
@@ -182,8 +277,11 @@ def create_demo_agent(demo_course: Dict) -> ConversationChain:
     Returns:
         Configured ConversationChain
     """
-    # Build system prompt
-    system_prompt = build_demo_agent_prompt(demo_course)
+    # Build system prompt (course block cached, usage block after it)
+    system_message = build_system_message(
+        build_demo_course_prompt(demo_course),
+        build_demo_usage_prompt(demo_course)
+    )
 
     # Initialize Claude Sonnet 4.5
     llm = ChatAnthropic(
@@ -196,16 +294,13 @@ def create_demo_agent(demo_course: Dict) -> ConversationChain:
 
     # Create prompt template
     prompt_template = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        system_message,
         MessagesPlaceholder(variable_name="history"),
         ("human", "{input}")
     ])
 
     # Create conversation memory
-    memory = ConversationBufferMemory(
-        memory_key="history",
-        return_messages=True
-    )
+    memory = create_memory()
 
     # Create chain
     chain = ConversationChain(
@@ -215,25 +310,112 @@ def create_demo_agent(demo_course: Dict) -> ConversationChain:
         verbose=False
     )
 
-    print(f"🎭 Demo agent created for {demo_course['name']}")
+    logger.info("🎭 Demo agent created for %s", demo_course['name'])
     return chain
 
 
+# Rough English average, close enough for deciding when to summarize
+CHARS_PER_TOKEN = 4
+
+
+class SummarizerModel(ChatAnthropic):
+    """
+    Summarizer whose token counts are estimated locally.
+
+    ConversationSummaryBufferMemory counts the buffer on every turn (and again
+    per message it prunes). ChatAnthropic counts through Anthropic's
+    count_tokens API - a blocking HTTP call that would stall the event loop.
+    """
+
+    def get_num_tokens(self, text: str) -> int:
+        return len(text) // CHARS_PER_TOKEN
+
+    def get_num_tokens_from_messages(self, messages, tools=None) -> int:
+        return len(get_buffer_string(messages)) // CHARS_PER_TOKEN
+
+
+def create_memory() -> ConversationSummaryBufferMemory:
+    """
+    Create conversation memory that keeps recent turns verbatim and
+    summarizes older ones, so per-turn context stays bounded on long calls.
+
+    Returns:
+        Configured ConversationSummaryBufferMemory
+    """
+    summarizer = SummarizerModel(
+        model=SUMMARIZER_MODEL,
+        temperature=0,
+        max_tokens=256,
+        anthropic_api_key=ANTHROPIC_API_KEY
+    )
+
+    return ConversationSummaryBufferMemory(
+        llm=summarizer,
+        max_token_limit=MEMORY_MAX_TOKEN_LIMIT,
+        memory_key="history",
+        return_messages=True
+    )
+
+
+def warmup(timeout: float):
+    """
+    Pay one-time agent costs up front (LangChain/Anthropic imports,
+    client setup, DNS + TLS to the API) with a token count request,
+    which is free, unlike a completion.
+
+    Args:
+        timeout: Seconds to wait for the API before giving up (no retries)
+    """
+    llm = ChatAnthropic(
+        model="claude-sonnet-4-5-20250929",
+        anthropic_api_key=ANTHROPIC_API_KEY,
+        default_request_timeout=timeout,
+        max_retries=0
+    )
+    llm.get_num_tokens_from_messages([HumanMessage("Hi")])
+
+
 # Helper functions for formatting
 
+@lru_cache(maxsize=256)
+def format_label(key: str) -> str:
+    """Turn a snake_case data key into a label (e.g. "twilight_rate" -> "Twilight Rate")"""
+    return key.replace('_', ' ').title()
+
+
+# Week order for hours (any other keys sort after, alphabetically)
+DAYS_OF_WEEK = {
+    day: index for index, day in enumerate(
+        ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    )
+}
+
+
+def _day_order(item) -> tuple:
+    day = item[0]
+    return (DAYS_OF_WEEK.get(day.lower(), len(DAYS_OF_WEEK)), day)
+
+
 def format_hours(hours: Dict) -> str:
     """Format hours of operation dictionary into readable string"""
     if not hours:
         return "Hours not specified"
 
-    lines = []
-    for day, times in hours.items():
-        if isinstance(times, dict):
-            open_time = times.get('open', 'N/A')
-            close_time = times.get('close', 'N/A')
-            lines.append(f"{day.capitalize()}: {open_time} - {close_time}")
+    return "\n".join(
+        f"{day.capitalize()}: {times.get('open', 'N/A')} - {times.get('close', 'N/A')}"
+        for day, times in sorted(hours.items(), key=_day_order)
+        if isinstance(times, dict)
+    ) or "Hours not specified"
+
 
-    return "\n".join(lines) if lines else "Hours not specified"
+def _pricing_lines(pricing: Dict) -> Iterator[str]:
+    for category, prices in sorted(pricing.items()):
+        if isinstance(prices, dict):
+            yield f"{format_label(category)}:"
+            for item, price in sorted(prices.items()):
+                yield f"  - {format_label(item)}: ${price}"
+        else:
+            yield f"{format_label(category)}: ${prices}"
 
 
 def format_pricing(pricing: Dict) -> str:
@@ -241,16 +423,7 @@ def format_pricing(pricing: Dict) -> str:
     if not pricing:
         return "Pricing not specified"
 
-    lines = []
-    for category, prices in pricing.items():
-        if isinstance(prices, dict):
-            lines.append(f"{category.replace('_', ' ').title()}:")
-            for item, price in prices.items():
-                lines.append(f"  - {item.replace('_', ' ').title()}: ${price}")
-        else:
-            lines.append(f"{category.replace('_', ' ').title()}: ${prices}")
-
-    return "\n".join(lines) if lines else "Pricing not specified"
+    return "\n".join(_pricing_lines(pricing)) or "Pricing not specified"
 
 
 def format_policies(policies: Dict) -> str:
@@ -258,11 +431,10 @@ def format_policies(policies: Dict) -> str:
     if not policies:
         return "No specific policies"
 
-    lines = []
-    for policy_name, policy_text in policies.items():
-        lines.append(f"**{policy_name.replace('_', ' ').title()}:** {policy_text}")
-
-    return "\n".join(lines)
+    return "\n".join(
+        f"**{format_label(policy_name)}:** {policy_text}"
+        for policy_name, policy_text in sorted(policies.items())
+    )
 
 
 def format_demo_data(scraped_data: Dict, ai_data: Dict) -> str:
@@ -271,12 +443,12 @@ def format_demo_data(scraped_data: Dict, ai_data: Dict) -> str:
 
     if scraped_data:
         parts.append("**Scraped from website:**")
-        for key, value in scraped_data.items():
+        for key, value in sorted(scraped_data.items()):
             parts.append(f"- {key}: {value}")
 
     if ai_data:
         parts.append("\n**AI-processed information:**")
-        for key, value in ai_data.items():
+        for key, value in sorted(ai_data.items()):
             if isinstance(value, list):
                 parts.append(f"- {key}: {', '.join(str(v) for v in value)}")
             else:
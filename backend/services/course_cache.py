@@ -0,0 +1,116 @@
+"""
+Course Cache - Short-lived cache of course rows
+Course data changes rarely, but every chat message needs it.
+Rows are cached per worker for 60 seconds.
+Demo interaction counts are kept longer, so the limit check stays in memory.
+"""
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+from cachetools import TTLCache
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Maps slug -> demo_courses row
+_demo_courses: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+# Maps slug -> (interaction_count, interaction_limit)
+# Refreshed whenever the database reports a count (row fetch or chat_demo_turn),
+# and reconciled with the database at least every 5 minutes
+_interaction_counts: TTLCache = TTLCache(maxsize=4096, ttl=300)
+
+# Maps id -> golf_courses row
+_golf_courses: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def get_demo_course(supabase: "Client", slug: str) -> Optional[Dict]:
+    """
+    Get a demo course by slug, from cache when possible.
+
+    Args:
+        supabase: Supabase client
+        slug: Demo course slug
+
+    Returns:
+        Demo course record, or None if it doesn't exist
+    """
+    demo_course = _demo_courses.get(slug)
+    if demo_course is not None:
+        return demo_course
+
+    response = supabase.table('demo_courses') \
+        .select('*') \
+        .eq('slug', slug) \
+        .execute()
+
+    if not response.data:
+        return None
+
+    demo_course = response.data[0]
+    update_demo_course(demo_course)
+    return demo_course
+
+
+def update_demo_course(demo_course: Dict):
+    """Replace the cached row with a fresher copy (e.g. after the count changed)"""
+    _demo_courses[demo_course['slug']] = demo_course
+    _interaction_counts[demo_course['slug']] = (
+        demo_course['interaction_count'],
+        demo_course['interaction_limit']
+    )
+
+
+def get_interaction_counts(slug: str) -> Optional[Tuple[int, int]]:
+    """
+    Last known (interaction_count, interaction_limit) for a demo.
+
+    Returns:
+        Counts tuple, or None if this worker hasn't seen the demo yet
+    """
+    return _interaction_counts.get(slug)
+
+
+def increment_interaction_count(slug: str):
+    """Count a turn locally (when it's recorded without reading back the count)"""
+    counts = _interaction_counts.get(slug)
+    if counts:
+        _interaction_counts[slug] = (counts[0] + 1, counts[1])
+
+
+def invalidate_demo_course(slug: str):
+    """Drop a demo course from the cache"""
+    _demo_courses.pop(slug, None)
+
+
+def mark_demo_exhausted(slug: str):
+    """Record that the database rejected a turn because the limit was reached"""
+    counts = _interaction_counts.get(slug)
+    if counts:
+        _interaction_counts[slug] = (counts[1], counts[1])
+
+
+def get_golf_course(supabase: "Client", golf_course_id: str) -> Optional[Dict]:
+    """
+    Get a golf course by ID, from cache when possible.
+
+    Args:
+        supabase: Supabase client
+        golf_course_id: UUID of the golf course
+
+    Returns:
+        Golf course record, or None if it doesn't exist
+    """
+    golf_course = _golf_courses.get(golf_course_id)
+    if golf_course is not None:
+        return golf_course
+
+    response = supabase.table('golf_courses') \
+        .select('*') \
+        .eq('id', golf_course_id) \
+        .execute()
+
+    if not response.data:
+        return None
+
+    golf_course = response.data[0]
+    _golf_courses[golf_course_id] = golf_course
+    return golf_course
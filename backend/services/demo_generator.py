@@ -4,21 +4,86 @@ Web scraping + AI processing to create custom demos
 """
 import re
 import httpx
-from bs4 import BeautifulSoup
-from typing import Dict, Optional
+from selectolax.lexbor import LexborHTMLParser
+from typing import Dict, Optional, Set
 import asyncio
+import logging
+from functools import lru_cache
 from urllib.parse import urlparse
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 
 from config.settings import ANTHROPIC_API_KEY
 
+logger = logging.getLogger(__name__)
+
+# Only the first few KB of text are used, so stop downloading after this much HTML
+MAX_HTML_BYTES = 200_000
+
+# Whitespace around line breaks (strips each line and drops blank ones)
+LINE_BREAKS = re.compile(r'\s*\n\s*')
+
+# Slug cleanup patterns (see generate_slug)
+SLUG_INVALID_CHARS = re.compile(r'[^a-z0-9\s-]')
+SLUG_SPACES = re.compile(r'\s+')
+SLUG_HYPHENS = re.compile(r'-+')
+
+# Tool the model is forced to call, so course info comes back as parsed JSON
+COURSE_INFO_TOOL = {
+    "name": "record_course_info",
+    "description": "Record key information about a golf course extracted from its website",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "course_name": {"type": "string", "description": "Official course name"},
+            "location": {"type": "string", "description": "City, State"},
+            "hours": {"type": "string", "description": "Operating hours if mentioned"},
+            "pricing_summary": {"type": "string", "description": "Brief pricing info if mentioned"},
+            "amenities": {"type": "array", "items": {"type": "string"}, "description": "List of amenities"},
+            "special_features": {"type": "string", "description": "Notable features, design, or highlights"},
+            "contact_info": {"type": "string", "description": "Phone/email if mentioned"}
+        },
+        "required": [
+            "course_name", "location", "hours", "pricing_summary",
+            "amenities", "special_features", "contact_info"
+        ]
+    }
+}
+
+
+# Lead inserts still running in the background
+_pending: Set[asyncio.Task] = set()
+
+
+@lru_cache(maxsize=1)
+def get_anthropic_client() -> AsyncAnthropic:
+    """Shared async Anthropic client (created on first use)"""
+    return AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def get_scrape_client() -> httpx.AsyncClient:
+    """Shared HTTP client for website scraping, so repeat hosts reuse pooled connections"""
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=15.0,
+        limits=httpx.Limits(max_keepalive_connections=50)
+    )
+
+
+async def close_clients():
+    """Close the shared Anthropic and scraping clients, if they were ever created"""
+    if get_anthropic_client.cache_info().currsize:
+        await get_anthropic_client().close()
+    if get_scrape_client.cache_info().currsize:
+        await get_scrape_client().aclose()
+
 
 async def scrape_golf_course_website(url: str) -> Dict:
     """
     Scrape golf course website for information.
 
     Two-stage approach:
-    1. Try BeautifulSoup (fast, simple)
+    1. Try a plain HTTP fetch + HTML parse (fast, simple)
     2. Fallback to Playwright (if JavaScript-heavy)
 
     Args:
@@ -27,19 +92,19 @@ async def scrape_golf_course_website(url: str) -> Dict:
     Returns:
         Dictionary with scraped data
     """
-    print(f"🌐 Scraping: {url}")
+    logger.info("🌐 Scraping: %s", url)
 
     # Stage 1: Try simple HTTP request
     try:
-        scraped_data = await scrape_with_beautifulsoup(url)
+        scraped_data = await scrape_with_selectolax(url)
         if scraped_data and scraped_data.get('text_content'):
-            print("✅ BeautifulSoup scraping successful")
+            logger.info("✅ HTML scraping successful")
             return scraped_data
     except Exception as e:
-        print(f"⚠️ BeautifulSoup failed: {e}")
+        logger.warning("⚠️ HTML scraping failed: %s", e)
 
     # Stage 2: Fallback to Playwright (not implemented in MVP)
-    print("⚠️ Playwright fallback not implemented in MVP")
+    logger.warning("⚠️ Playwright fallback not implemented in MVP")
 
     return {
         'url': url,
@@ -50,9 +115,9 @@ async def scrape_golf_course_website(url: str) -> Dict:
     }
 
 
-async def scrape_with_beautifulsoup(url: str) -> Dict:
+async def scrape_with_selectolax(url: str) -> Dict:
     """
-    Scrape website using BeautifulSoup.
+    Scrape website using selectolax (Lexbor C HTML parser).
 
     Args:
         url: Website URL
@@ -64,42 +129,51 @@ async def scrape_with_beautifulsoup(url: str) -> Dict:
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
-        response = await client.get(url)
+    # Stream the body and stop at MAX_HTML_BYTES, so huge pages never load fully
+    async with get_scrape_client().stream("GET", url) as response:
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        html = bytearray()
+        async for chunk in response.aiter_bytes():
+            html.extend(chunk)
+            if len(html) >= MAX_HTML_BYTES:
+                break
 
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.decompose()
+        encoding = response.encoding or 'utf-8'
 
-        # Extract title
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ''
+    tree = LexborHTMLParser(html[:MAX_HTML_BYTES].decode(encoding, errors='replace'))
 
-        # Extract meta description
-        description = ''
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc:
-            description = meta_desc.get('content', '')
+    # Remove script and style elements
+    for node in tree.css("script, style, nav, footer"):
+        node.decompose()
 
-        # Extract main text content
-        text_content = soup.get_text(separator='\n', strip=True)
+    # Extract title
+    title = tree.css_first('title')
+    title_text = title.text().strip() if title else ''
 
-        # Clean up whitespace
-        text_content = '\n'.join(line.strip() for line in text_content.split('\n') if line.strip())
+    # Extract meta description
+    description = ''
+    meta_desc = tree.css_first('meta[name="description"]')
+    if meta_desc:
+        description = meta_desc.attributes.get('content') or ''
 
-        # Limit to first 5000 characters (for AI processing)
-        text_content = text_content[:5000]
+    # Extract main text content
+    root = tree.body or tree.root
+    text_content = root.text(separator='\n', strip=True) if root else ''
 
-        return {
-            'url': url,
-            'title': title_text,
-            'description': description,
-            'text_content': text_content,
-            'method': 'beautifulsoup'
-        }
+    # Clean up whitespace
+    text_content = LINE_BREAKS.sub('\n', text_content).strip()
+
+    # Limit to first 5000 characters (for AI processing)
+    text_content = text_content[:5000]
+
+    return {
+        'url': url,
+        'title': title_text,
+        'description': description,
+        'text_content': text_content,
+        'method': 'selectolax'
+    }
 
 
 def generate_slug(name: str) -> str:
@@ -116,16 +190,16 @@ def generate_slug(name: str) -> str:
     slug = name.lower()
 
     # Remove special characters
-    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
+    slug = SLUG_INVALID_CHARS.sub('', slug)
 
     # Replace spaces with hyphens
-    slug = re.sub(r'\s+', '-', slug)
+    slug = SLUG_SPACES.sub('-', slug)
 
     # Remove multiple hyphens
-    slug = re.sub(r'-+', '-', slug)
+    slug = SLUG_HYPHENS.sub('-', slug)
 
-    # Trim hyphens from ends
-    slug = slug.strip('-')
+    # Cap length (leaves room for a uniqueness suffix), then trim hyphens from ends
+    slug = slug[:100].strip('-')
 
     return slug
 
@@ -141,12 +215,12 @@ async def process_with_ai(scraped_data: Dict, course_name: str) -> Dict:
     Returns:
         Dictionary with structured AI-processed data
     """
-    print("🤖 Processing with AI...")
+    logger.info("🤖 Processing with AI...")
 
     text_content = scraped_data.get('text_content', '')
 
     if not text_content:
-        print("⚠️ No content to process")
+        logger.warning("⚠️ No content to process")
         return {
             'course_name': course_name,
             'summary': f'{course_name} - Custom demo created',
@@ -160,48 +234,35 @@ Course Name: {course_name}
 Website Content:
 {text_content}
 
-Extract and return ONLY a JSON object with these fields:
-{{
-    "course_name": "Official course name",
-    "location": "City, State",
-    "hours": "Operating hours if mentioned",
-    "pricing_summary": "Brief pricing info if mentioned",
-    "amenities": ["list", "of", "amenities"],
-    "special_features": "Notable features, design, or highlights",
-    "contact_info": "Phone/email if mentioned"
-}}
-
+Record the course information with the record_course_info tool.
 If information isn't found, use empty string or empty array. Keep it concise."""
 
     try:
-        client = Anthropic(api_key=ANTHROPIC_API_KEY)
-
-        response = client.messages.create(
+        response = await get_anthropic_client().messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=1000,
+            tools=[COURSE_INFO_TOOL],
+            tool_choice={"type": "tool", "name": COURSE_INFO_TOOL["name"]},
             messages=[{"role": "user", "content": prompt}]
         )
 
-        response_text = response.content[0].text
-
-        # Extract JSON from response
-        import json
-
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            ai_data = json.loads(json_match.group())
-            print("✅ AI processing successful")
-            return ai_data
+        # tool_choice forces a tool_use block whose input is already parsed JSON
+        tool_use = next(
+            (block for block in response.content if block.type == "tool_use"),
+            None
+        )
+        if tool_use:
+            logger.info("✅ AI processing successful")
+            return tool_use.input
         else:
-            print("⚠️ Could not parse AI response as JSON")
+            logger.warning("⚠️ AI response had no course info")
             return {
                 'course_name': course_name,
-                'summary': response_text[:200]
+                'summary': f'{course_name} - Custom demo created'
             }
 
     except Exception as e:
-        print(f"❌ AI processing error: {e}")
+        logger.error("❌ AI processing error: %s", e)
         return {
             'course_name': course_name,
             'error': str(e)
@@ -219,10 +280,10 @@ async def create_demo_course(
 
     Steps:
     1. Generate slug
-    2. Scrape website
+    2. Scrape website (while checking the slug is unique)
     3. Process with AI
     4. Create database record
-    5. Create lead record
+    5. Create lead record (in the background)
 
     Args:
         course_name: Name of the golf course
@@ -233,28 +294,24 @@ async def create_demo_course(
     Returns:
         Created demo course record
     """
-    print(f"\n{'='*60}")
-    print(f"Creating demo for: {course_name}")
-    print(f"{'='*60}\n")
+    logger.info("🏌️ Creating demo for: %s", course_name)
 
     # Step 1: Generate slug
     slug = generate_slug(course_name)
-    print(f"📝 Generated slug: {slug}")
+    logger.info("📝 Generated slug: %s", slug)
 
-    # Check if slug already exists
-    existing = supabase.table('demo_courses') \
-        .select('id') \
-        .eq('slug', slug) \
-        .execute()
+    # Step 2: Scrape website, checking the slug in the meantime
+    # (the Supabase client is blocking, so the check runs in a thread)
+    scraped_data, duplicate = await asyncio.gather(
+        scrape_golf_course_website(website_url),
+        asyncio.to_thread(slug_exists, supabase, slug)
+    )
 
-    if existing.data:
+    if duplicate:
         # Slug exists - add random suffix
         import uuid
         slug = f"{slug}-{str(uuid.uuid4())[:8]}"
-        print(f"📝 Slug updated (duplicate): {slug}")
-
-    # Step 2: Scrape website
-    scraped_data = await scrape_golf_course_website(website_url)
+        logger.info("📝 Slug updated (duplicate): %s", slug)
 
     # Step 3: Process with AI
     ai_data = await process_with_ai(scraped_data, course_name)
@@ -270,12 +327,14 @@ async def create_demo_course(
         'status': 'active'
     }
 
-    result = supabase.table('demo_courses').insert(demo_course).execute()
+    result = await asyncio.to_thread(
+        supabase.table('demo_courses').insert(demo_course).execute
+    )
     created_course = result.data[0]
 
-    print(f"✅ Demo course created: {created_course['id']}")
+    logger.info("✅ Demo course created: %s", created_course['id'])
 
-    # Step 5: Create lead record
+    # Step 5: Create lead record (the response doesn't depend on it)
     lead = {
         'demo_course_id': created_course['id'],
         'email': email,
@@ -284,11 +343,35 @@ async def create_demo_course(
         'status': 'new'
     }
 
-    supabase.table('demo_leads').insert(lead).execute()
-    print(f"✅ Lead captured: {email}")
+    task = asyncio.create_task(insert_lead(supabase, lead))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
 
-    print(f"\n{'='*60}")
-    print(f"Demo ready at: /demo/{slug}")
-    print(f"{'='*60}\n")
+    logger.info("🎉 Demo ready at: /demo/%s", slug)
 
     return created_course
+
+
+def slug_exists(supabase, slug: str) -> bool:
+    """Check whether a demo course already uses this slug"""
+    existing = supabase.table('demo_courses') \
+        .select('id') \
+        .eq('slug', slug) \
+        .execute()
+
+    return bool(existing.data)
+
+
+async def wait_for_pending_leads():
+    """Wait for background lead inserts (call from the app lifespan on shutdown)"""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+async def insert_lead(supabase, lead: Dict):
+    """Insert a demo_leads row (runs in the background after demo creation)"""
+    try:
+        await asyncio.to_thread(supabase.table('demo_leads').insert(lead).execute)
+        logger.info("✅ Lead captured: %s", lead['email'])
+    except Exception as e:
+        logger.error("❌ Error capturing lead %s: %s", lead['email'], e)
@@ -0,0 +1,141 @@
+"""
+Embeddings - Batched OpenAI embedding requests
+Callers await one text at a time; a background task groups pending texts
+into a single embeddings request (up to 64 inputs, or every 50ms).
+Short texts are cached, so repeated utterances are embedded once.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+from cachetools import LRUCache
+from openai import AsyncOpenAI
+from config.settings import OPENAI_API_KEY
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+MAX_BATCH_SIZE = 64
+FLUSH_INTERVAL_SECONDS = 0.05
+
+# Only short texts (utterances, phrases) repeat often enough to be worth caching.
+# A 1536-float embedding is ~50KB as a Python list, so 1024 entries is ~50MB.
+CACHE_MAX_TEXT_LENGTH = 512
+CACHE_MAX_ENTRIES = 1024
+
+# Maps blake2b(text) -> future of its embedding (in-flight requests are shared too)
+_cache: LRUCache = LRUCache(maxsize=CACHE_MAX_ENTRIES)
+
+# Queued to tell the worker to flush and exit
+_STOP = object()
+
+_client: Optional[AsyncOpenAI] = None
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+
+
+def start():
+    """Create the client and start the background batching task"""
+    global _client, _queue, _worker
+
+    _client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    _queue = asyncio.Queue()
+    _worker = asyncio.create_task(_run())
+
+
+async def stop():
+    """Finish every queued request, stop the background task and close the client"""
+    if _worker is None:
+        return
+
+    await _queue.put(_STOP)
+    await _worker
+    await _client.close()
+
+
+async def embed(text: str) -> List[float]:
+    """
+    Embed one text, batched with any other texts queued in the same window.
+
+    Args:
+        text: Text to embed
+
+    Returns:
+        1536-dimensional embedding vector
+    """
+    if _worker is None:
+        start()
+
+    if len(text) >= CACHE_MAX_TEXT_LENGTH:
+        future = asyncio.get_running_loop().create_future()
+        await _queue.put((text, future))
+        return await future
+
+    key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    future = _cache.get(key)
+    if future is None:
+        future = _cache[key] = asyncio.get_running_loop().create_future()
+        await _queue.put((text, future))
+
+    try:
+        return await asyncio.shield(future)
+    except Exception:
+        # Don't cache failures - the next caller retries
+        if _cache.get(key) is future:
+            del _cache[key]
+        raise
+
+
+async def _run():
+    """Drain the queue in batches until stopped"""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        item = await _queue.get()
+        if item is _STOP:
+            return
+
+        batch = [item]
+        stopping = False
+        deadline = loop.time() + FLUSH_INTERVAL_SECONDS
+
+        while len(batch) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+
+        await _flush(batch)
+
+        if stopping:
+            return
+
+
+async def _flush(batch: List[Tuple[str, asyncio.Future]]):
+    """Send one embeddings request for the batch and resolve each caller's future"""
+    try:
+        response = await _client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[text for text, _ in batch]
+        )
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+
+    # Results come back in input order (each carries its index)
+    for data in response.data:
+        future = batch[data.index][1]
+        if not future.done():
+            future.set_result(data.embedding)
+
+    logger.debug("🔢 Generated %d embeddings in one request", len(batch))
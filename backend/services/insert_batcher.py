@@ -0,0 +1,128 @@
+"""
+Insert Batcher - Batched demo interaction logging
+Handlers queue turns reserved with reserve_demo_turn; one background task
+formats them and fills in their transcripts with a single multi-row upsert
+per batch (up to 200 rows, or every 250ms).
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, TYPE_CHECKING
+from services.memory import format_transcript
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 0.25
+MAX_QUEUE_SIZE = 10_000
+
+# Queued to tell the worker to flush and exit
+_STOP = object()
+
+_supabase: Optional["Client"] = None
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+
+# Direct inserts issued while the queue was full
+_pending: Set[asyncio.Task] = set()
+
+
+def start(supabase: "Client"):
+    """Start the background flush task (call from the app lifespan)"""
+    global _supabase, _queue, _worker
+
+    _supabase = supabase
+    _queue = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+    _worker = asyncio.create_task(_run())
+
+
+async def stop():
+    """Flush every queued row and stop the background task"""
+    if _worker is None:
+        return
+
+    await _queue.put(_STOP)
+    await _worker
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+def enqueue(interaction: Dict):
+    """
+    Queue a demo interaction for the next batch.
+    Falls back to a direct insert if the queue is full, so no data is lost.
+
+    The transcript is rendered at flush time, off the request path.
+
+    Args:
+        interaction: demo_interactions row (id from reserve_demo_turn), with
+            user_message and agent_response in place of transcript
+    """
+    try:
+        _queue.put_nowait(interaction)
+    except asyncio.QueueFull:
+        logger.warning("⚠️ Interaction queue full, inserting directly")
+        task = asyncio.create_task(_flush([interaction]))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+
+
+async def _run():
+    """Drain the queue in batches until stopped"""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        row = await _queue.get()
+        if row is _STOP:
+            return
+
+        rows = [row]
+        stopping = False
+        deadline = loop.time() + FLUSH_INTERVAL_SECONDS
+
+        while len(rows) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is _STOP:
+                stopping = True
+                break
+            rows.append(row)
+
+        await _flush(rows)
+
+        if stopping:
+            return
+
+
+async def _flush(rows: List[Dict]):
+    """Write a batch of rows (the Supabase client is blocking, so use a thread)"""
+    try:
+        await asyncio.to_thread(_upsert, rows)
+        logger.info("📝 %d demo interactions recorded", len(rows))
+    except Exception as e:
+        logger.exception("❌ Error recording %d demo interactions: %s", len(rows), e)
+
+
+def _upsert(interactions: List[Dict]):
+    # The rows already exist (reserved), so this updates them by id; an upsert
+    # keeps it one request, and doesn't fire the insert-only counter trigger
+    rows = [
+        {
+            'id': interaction['id'],
+            'demo_course_id': interaction['demo_course_id'],
+            'channel': interaction['channel'],
+            'session_id': interaction['session_id'],
+            'transcript': format_transcript(
+                interaction['user_message'], interaction['agent_response']
+            )
+        }
+        for interaction in interactions
+    ]
+    _supabase.table('demo_interactions').upsert(rows).execute()
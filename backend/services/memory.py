@@ -4,24 +4,37 @@ Implements the two-tier memory strategy:
 1. Store ALL conversations permanently
 2. Retrieve last 3 for context injection
 """
-from typing import Dict, List, Optional
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 from datetime import datetime
-from supabase import Client
-import openai
-from config.settings import OPENAI_API_KEY
+from cachetools import LRUCache
+from services import embeddings
 
-# Initialize OpenAI client for embeddings
-openai.api_key = OPENAI_API_KEY
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+# Maps (caller_id, newest conversation id, count) -> formatted context string
+_context_cache: LRUCache = LRUCache(maxsize=4096)
+
+# Longest transcript excerpt used in place of a missing summary
+TRANSCRIPT_PREVIEW_CHARS = 200
+
+# Conversation writes still running in the background (awaited on shutdown)
+_pending: Set[asyncio.Task] = set()
 
 
 def identify_or_create_caller(
-    supabase: Client,
+    supabase: "Client",
     phone_number: str,
     golf_course_id: str
 ) -> Dict:
     """
     Auto-create caller account if first time, or retrieve existing caller.
-    Zero-friction account creation!
+    Zero-friction account creation! Single round trip via the upsert_caller RPC
+    (INSERT ... ON CONFLICT DO UPDATE SET last_seen).
 
     Args:
         supabase: Supabase client
@@ -31,41 +44,21 @@ def identify_or_create_caller(
     Returns:
         Caller record dictionary
     """
-    # Try to find existing caller
-    response = supabase.table('callers') \
-        .select('*') \
-        .eq('phone_number', phone_number) \
-        .eq('golf_course_id', golf_course_id) \
-        .execute()
-
-    if response.data:
-        # Existing caller found - update last_seen
-        caller = response.data[0]
-        supabase.table('callers') \
-            .update({'last_seen': datetime.now().isoformat()}) \
-            .eq('id', caller['id']) \
-            .execute()
-
-        print(f"✅ Returning caller identified: {phone_number} (ID: {caller['id']})")
-        return caller
-
-    # New caller - create account automatically
-    new_caller = {
-        'phone_number': phone_number,
-        'golf_course_id': golf_course_id,
-        'total_conversations': 0,
-        'preferences': {}
-    }
-
-    result = supabase.table('callers').insert(new_caller).execute()
-    caller = result.data[0]
+    response = supabase.rpc(
+        'upsert_caller',
+        {
+            'p_phone_number': phone_number,
+            'p_golf_course_id': golf_course_id
+        }
+    ).execute()
 
-    print(f"🆕 New caller auto-created: {phone_number} (ID: {caller['id']})")
+    caller = response.data
+    logger.info("✅ Caller identified: %s (ID: %s)", phone_number, caller['id'])
     return caller
 
 
 def get_recent_conversations(
-    supabase: Client,
+    supabase: "Client",
     caller_id: str,
     limit: int = 3
 ) -> List[Dict]:
@@ -89,13 +82,49 @@ def get_recent_conversations(
         .execute()
 
     conversations = response.data
-    print(f"📚 Retrieved {len(conversations)} recent conversations for caller {caller_id}")
+    logger.info("📚 Retrieved %d recent conversations for caller %s", len(conversations), caller_id)
 
     return conversations
 
 
-def store_conversation(
-    supabase: Client,
+def identify_caller_with_history(
+    supabase: "Client",
+    phone_number: str,
+    golf_course_id: str,
+    limit: int = 3
+) -> Tuple[Dict, List[Dict]]:
+    """
+    Identify or auto-create a caller and fetch their recent conversations.
+    Single round trip via the get_caller_with_history RPC, so history
+    doesn't have to wait for the caller lookup.
+
+    Args:
+        supabase: Supabase client
+        phone_number: Caller's phone number (unique identifier)
+        golf_course_id: Which golf course they're calling
+        limit: How many recent conversations to retrieve (default: 3)
+
+    Returns:
+        (caller record, list of conversations newest first)
+    """
+    response = supabase.rpc(
+        'get_caller_with_history',
+        {
+            'p_phone_number': phone_number,
+            'p_golf_course_id': golf_course_id,
+            'p_limit': limit
+        }
+    ).execute()
+
+    caller = response.data['caller']
+    conversations = response.data['conversations']
+    logger.info("📚 Caller %s identified with %d recent conversations", caller['id'], len(conversations))
+
+    return caller, conversations
+
+
+async def store_conversation(
+    supabase: "Client",
     caller_id: str,
     golf_course_id: str,
     transcript: str,
@@ -126,7 +155,7 @@ def store_conversation(
         Created conversation record
     """
     # Generate embedding for semantic search
-    embedding = generate_embedding(transcript)
+    embedding = await generate_embedding(transcript)
 
     conversation = {
         'caller_id': caller_id,
@@ -141,17 +170,52 @@ def store_conversation(
         'embedding': embedding
     }
 
-    result = supabase.table('conversations').insert(conversation).execute()
+    result = await asyncio.to_thread(
+        supabase.table('conversations').insert(conversation).execute
+    )
     stored = result.data[0]
 
-    print(f"💾 Conversation stored (ID: {stored['id']}, channel: {channel})")
+    logger.info("💾 Conversation stored (ID: %s, channel: %s)", stored['id'], channel)
     return stored
 
 
-def generate_embedding(text: str) -> List[float]:
+def store_conversation_in_background(supabase: "Client", **fields) -> asyncio.Task:
+    """
+    Store a conversation without waiting for the embedding and insert.
+    Failures are logged along with the transcript, so nothing is lost silently.
+
+    Args:
+        supabase: Supabase client
+        **fields: store_conversation keyword arguments
+
+    Returns:
+        The background task
+    """
+    task = asyncio.create_task(_store_conversation_logged(supabase, **fields))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+
+async def _store_conversation_logged(supabase: "Client", **fields):
+    try:
+        await store_conversation(supabase, **fields)
+    except Exception as e:
+        logger.warning("⚠️ Error storing conversation: %s", e)
+        logger.warning("📝 Transcript:\n%s", fields.get('transcript'))
+
+
+async def wait_for_pending_stores():
+    """Wait for background conversation writes (call from the app lifespan on shutdown)"""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+async def generate_embedding(text: str) -> List[float]:
     """
     Generate OpenAI embedding for semantic search.
-    Uses text-embedding-3-small ($0.02/1M tokens).
+    Uses text-embedding-3-small ($0.02/1M tokens), batched with
+    concurrent requests into one API call.
 
     Args:
         text: Text to embed
@@ -160,17 +224,18 @@ def generate_embedding(text: str) -> List[float]:
         1536-dimensional embedding vector
     """
     try:
-        response = openai.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        embedding = response.data[0].embedding
-        print(f"🔢 Generated embedding (dim: {len(embedding)})")
+        embedding = await embeddings.embed(text)
+        logger.info("🔢 Generated embedding (dim: %d)", len(embedding))
         return embedding
     except Exception as e:
-        print(f"⚠️ Error generating embedding: {e}")
+        logger.warning("⚠️ Error generating embedding: %s", e)
         # Return zero vector as fallback
-        return [0.0] * 1536
+        return [0.0] * embeddings.EMBEDDING_DIMENSIONS
+
+
+def format_transcript(user_message: str, agent_response: str) -> str:
+    """Format one chat turn as stored in transcript columns"""
+    return f"User: {user_message}\nAgent: {agent_response}"
 
 
 def build_context_string(conversations: List[Dict]) -> str:
@@ -202,20 +267,72 @@ def build_context_string(conversations: List[Dict]) -> str:
             time_str = created_at
 
         # Add conversation with metadata
-        summary = conv.get('summary') or conv['transcript'][:200] + "..."
+        summary = conv.get('summary') or preview_transcript(conv['transcript'])
 
         context_parts.append(
             f"**Conversation {i}** ({time_str} via {channel}):\n{summary}"
         )
 
     context_string = "\n\n".join(context_parts)
-    print(f"📝 Built context string ({len(context_string)} chars)")
+    logger.info("📝 Built context string (%d chars)", len(context_string))
+
+    return context_string
+
+
+def preview_transcript(transcript: str) -> str:
+    """
+    Shorten a transcript for context injection, cutting at a word boundary
+    so the model never sees a half word (or half a multi-byte character run).
+
+    Args:
+        transcript: Full conversation text
+
+    Returns:
+        Transcript, or its first ~TRANSCRIPT_PREVIEW_CHARS characters followed by "..."
+    """
+    if len(transcript) <= TRANSCRIPT_PREVIEW_CHARS:
+        return transcript
+
+    cut = transcript[:TRANSCRIPT_PREVIEW_CHARS]
+    if not transcript[TRANSCRIPT_PREVIEW_CHARS].isspace():
+        # Drop the partial last word
+        parts = cut.rsplit(None, 1)
+        cut = parts[0] if parts else ""
+
+    return cut.rstrip() + "..."
+
+
+def get_context_string(caller_id: str, conversations: List[Dict]) -> str:
+    """
+    Cached build_context_string for a caller.
+    Storing a new conversation changes the newest conversation ID,
+    so cached entries never go stale and need no explicit invalidation.
+
+    Args:
+        caller_id: UUID of the caller
+        conversations: List of conversation dictionaries (newest first)
 
+    Returns:
+        Formatted context string for LLM injection
+    """
+    key = (
+        caller_id,
+        conversations[0]['id'] if conversations else None,
+        len(conversations)
+    )
+
+    try:
+        return _context_cache[key]
+    except KeyError:
+        pass
+
+    context_string = build_context_string(conversations)
+    _context_cache[key] = context_string
     return context_string
 
 
-def retrieve_relevant_memories(
-    supabase: Client,
+async def retrieve_relevant_memories(
+    supabase: "Client",
     caller_id: str,
     query_text: str,
     limit: int = 5
@@ -237,24 +354,26 @@ def retrieve_relevant_memories(
         List of relevant conversation dictionaries
     """
     # Generate embedding for query
-    query_embedding = generate_embedding(query_text)
+    query_embedding = await generate_embedding(query_text)
 
     # Supabase vector search
     # Note: This requires a stored procedure in Supabase for vector similarity
     # For MVP, we're using the simpler "last 3" approach instead
 
-    response = supabase.rpc(
-        'match_conversations',
-        {
-            'query_embedding': query_embedding,
-            'match_threshold': 0.7,
-            'match_count': limit,
-            'p_caller_id': caller_id
-        }
-    ).execute()
+    response = await asyncio.to_thread(
+        supabase.rpc(
+            'match_conversations',
+            {
+                'query_embedding': query_embedding,
+                'match_threshold': 0.7,
+                'match_count': limit,
+                'p_caller_id': caller_id
+            }
+        ).execute
+    )
 
     memories = response.data
-    print(f"🔍 Found {len(memories)} semantically relevant memories")
+    logger.info("🔍 Found %d semantically relevant memories", len(memories))
 
     return memories
 
@@ -263,7 +382,7 @@ def retrieve_relevant_memories(
 # Run this SQL in Supabase to enable retrieve_relevant_memories():
 """
 CREATE OR REPLACE FUNCTION match_conversations(
-  query_embedding VECTOR(1536),
+  query_embedding HALFVEC(1536),
   match_threshold FLOAT,
   match_count INT,
   p_caller_id UUID
@@ -278,18 +397,24 @@ RETURNS TABLE (
 LANGUAGE plpgsql
 AS $$
 BEGIN
+  -- Top-K by distance first (ORDER BY <=> ... LIMIT is what the HNSW
+  -- index serves), then apply the similarity threshold to those rows
   RETURN QUERY
-  SELECT
-    c.id,
-    c.transcript,
-    c.summary,
-    c.created_at,
-    1 - (c.embedding <=> query_embedding) AS similarity
-  FROM conversations c
-  WHERE c.caller_id = p_caller_id
-    AND 1 - (c.embedding <=> query_embedding) > match_threshold
-  ORDER BY c.embedding <=> query_embedding
-  LIMIT match_count;
+  SELECT *
+  FROM (
+    SELECT
+      c.id,
+      c.transcript,
+      c.summary,
+      c.created_at,
+      1 - (c.embedding <=> query_embedding) AS similarity
+    FROM conversations c
+    WHERE c.caller_id = p_caller_id
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count
+  ) top_matches
+  WHERE top_matches.similarity > match_threshold
+  ORDER BY top_matches.similarity DESC;
 END;
 $$;
 """
@@ -0,0 +1,239 @@
+"""
+WebRTC Voice Transport
+Browser calls over a WebRTC peer connection (UDP + jitter buffer, Opus)
+Skips the μ-law conversions the Twilio Media Streams path needs
+"""
+import asyncio
+import fractions
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+import av
+from aiortc import MediaStreamTrack, RTCPeerConnection, RTCSessionDescription
+from aiortc.mediastreams import MediaStreamError
+
+from services.voice import initialize_deepgram_stream, stream_text_to_speech, ELEVENLABS_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# aiortc's Opus decoder hands us 48kHz, 16-bit, stereo frames
+INBOUND_SAMPLE_RATE = 48000
+INBOUND_CHANNELS = 2
+
+# Outbound frames are 20ms of ElevenLabs PCM (Opus-encoded by aiortc)
+FRAME_SAMPLES = ELEVENLABS_SAMPLE_RATE // 50
+FRAME_BYTES = FRAME_SAMPLES * 2
+
+# Said instead of answering once the demo has used all its interactions
+DEMO_LIMIT_TEXT = "This demo has reached its limit. Contact us to unlock the full version!"
+
+# Utterances waiting for the agent; more than this and new ones are dropped
+MAX_PENDING_UTTERANCES = 4
+
+# Peer connections that haven't connected by then are closed
+CONNECT_TIMEOUT_SECONDS = 30
+
+# Open peer connections (holds a reference until the call ends)
+peer_connections: Set[RTCPeerConnection] = set()
+
+
+class SpeechTrack(MediaStreamTrack):
+    """Outbound audio track that plays queued TTS audio, silence otherwise"""
+
+    kind = "audio"
+
+    def __init__(self):
+        super().__init__()
+        self._pcm = bytearray()
+        self._start = None
+        self._timestamp = 0
+
+    def play(self, pcm: bytes):
+        """Queue 16-bit mono PCM at ELEVENLABS_SAMPLE_RATE"""
+        self._pcm.extend(pcm)
+
+    async def recv(self) -> av.AudioFrame:
+        if self.readyState != "live":
+            raise MediaStreamError
+
+        # Pace frames in real time on the loop's monotonic clock
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = loop.time()
+        else:
+            self._timestamp += FRAME_SAMPLES
+            await asyncio.sleep(self._start + self._timestamp / ELEVENLABS_SAMPLE_RATE - loop.time())
+
+        chunk = bytes(self._pcm[:FRAME_BYTES]).ljust(FRAME_BYTES, b'\0')
+        del self._pcm[:FRAME_BYTES]
+
+        frame = av.AudioFrame(format="s16", layout="mono", samples=FRAME_SAMPLES)
+        frame.planes[0].update(chunk)
+        frame.pts = self._timestamp
+        frame.sample_rate = ELEVENLABS_SAMPLE_RATE
+        frame.time_base = fractions.Fraction(1, ELEVENLABS_SAMPLE_RATE)
+        return frame
+
+
+async def forward_to_deepgram(track: MediaStreamTrack, deepgram_ws):
+    """Send decoded inbound frames to Deepgram until the track ends"""
+    while True:
+        try:
+            frame = await track.recv()
+        except MediaStreamError:
+            return
+
+        await deepgram_ws.send(frame.to_ndarray().tobytes())
+
+
+async def speak(track: SpeechTrack, text: str):
+    """Stream speech as raw PCM (no MP3 decode) onto the track as it arrives"""
+    async for pcm in stream_text_to_speech(text, output_format=f"pcm_{ELEVENLABS_SAMPLE_RATE}"):
+        track.play(pcm)
+
+
+async def answer_offer(
+    sdp: str,
+    sdp_type: str,
+    session_id: str,
+    reply_sentences: Callable[[str], AsyncIterator[str]],
+    greeting: str,
+    reserve_turn: Callable[[], Awaitable[Optional[str]]],
+    record_turn: Callable[[str, str, str], None]
+) -> Dict:
+    """
+    Answer a browser's WebRTC offer and run the voice pipeline over it.
+
+    Args:
+        sdp: Offer SDP from the browser
+        sdp_type: SDP type (always "offer")
+        session_id: Identifier used in logs and for Deepgram
+        reply_sentences: Runs one agent turn, yielding the reply a sentence at a time
+        greeting: First thing the agent says
+        reserve_turn: Claims an interaction before each turn (None = limit reached)
+        record_turn: Called with (interaction id, user message, reply) after each turn
+
+    Returns:
+        Answer description ({sdp, type}) to send back to the browser
+    """
+    pc = RTCPeerConnection()
+    peer_connections.add(pc)
+
+    speech = SpeechTrack()
+    pc.addTrack(speech)
+
+    state = {
+        'deepgram_ws': None,
+        # Final transcripts, answered one at a time by agent_worker
+        'utterances': asyncio.Queue(maxsize=MAX_PENDING_UTTERANCES),
+        # Greeting and audio forwarding (cancelled when the call closes)
+        'tasks': set(),
+        'closed': False
+    }
+
+    async def respond(transcript: str):
+        try:
+            logger.info("👤 [%s] User: %s", session_id, transcript)
+
+            interaction_id = await reserve_turn()
+            if interaction_id is None:
+                logger.info("🚫 [%s] Demo limit reached", session_id)
+                await speak(speech, DEMO_LIMIT_TEXT)
+                return
+
+            # Speak each sentence as soon as the LLM finishes it
+            reply = []
+            async for sentence in reply_sentences(transcript):
+                reply.append(sentence)
+                await speak(speech, sentence)
+
+            agent_response = " ".join(reply)
+            logger.info("🤖 [%s] Agent: %s", session_id, agent_response)
+            record_turn(interaction_id, transcript, agent_response)
+        except Exception as e:
+            logger.error("❌ Error processing agent response: %s", e)
+
+    async def agent_worker():
+        """Answer queued utterances in order, one at a time (runs for the whole call)"""
+        while True:
+            transcript = await state['utterances'].get()
+            await respond(transcript)
+
+    def on_transcript(transcript: str, is_final: bool):
+        """Handle transcripts from Deepgram (called on the event loop)"""
+        if is_final and transcript.strip():
+            # Queue for agent processing (drop if the caller is far ahead)
+            try:
+                state['utterances'].put_nowait(transcript)
+            except asyncio.QueueFull:
+                logger.warning("⚠️ Agent busy, dropping utterance: %s", transcript[:50])
+
+    async def close():
+        """Tear down the call (idempotent)"""
+        if state['closed']:
+            return
+        state['closed'] = True
+
+        worker.cancel()
+        for task in list(state['tasks']):
+            task.cancel()
+        if asyncio.current_task() is not connect_timeout:
+            connect_timeout.cancel()
+        if state['deepgram_ws']:
+            try:
+                await state['deepgram_ws'].finish()
+            except Exception:
+                pass
+        await pc.close()
+        peer_connections.discard(pc)
+
+    async def close_if_not_connected():
+        """Drop peer connections that never finish ICE/DTLS setup"""
+        await asyncio.sleep(CONNECT_TIMEOUT_SECONDS)
+        if pc.connectionState != "connected":
+            logger.warning("⚠️ WebRTC session never connected: %s", session_id)
+            await close()
+
+    worker = asyncio.create_task(agent_worker())
+    connect_timeout = asyncio.create_task(close_if_not_connected())
+
+    @pc.on("track")
+    async def on_track(track: MediaStreamTrack):
+        if track.kind != "audio" or state['closed']:
+            return
+
+        deepgram_ws = await initialize_deepgram_stream(
+            session_id,
+            on_transcript,
+            encoding="linear16",
+            sample_rate=INBOUND_SAMPLE_RATE,
+            channels=INBOUND_CHANNELS
+        )
+        if state['closed']:
+            # The call ended while Deepgram was connecting
+            await deepgram_ws.finish()
+            return
+        state['deepgram_ws'] = deepgram_ws
+        for coro in (forward_to_deepgram(track, state['deepgram_ws']), speak(speech, greeting)):
+            task = asyncio.create_task(coro)
+            state['tasks'].add(task)
+            task.add_done_callback(state['tasks'].discard)
+
+    @pc.on("connectionstatechange")
+    async def on_connection_state_change():
+        if pc.connectionState == "connected":
+            connect_timeout.cancel()
+        elif pc.connectionState in ("failed", "closed"):
+            logger.info("📴 WebRTC session ended: %s", session_id)
+            await close()
+
+    try:
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type=sdp_type))
+        await pc.setLocalDescription(await pc.createAnswer())
+    except Exception:
+        # Bad offer - don't leave the connection and its tasks behind
+        await close()
+        raise
+
+    return {'sdp': pc.localDescription.sdp, 'type': pc.localDescription.type}
+
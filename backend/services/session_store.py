@@ -0,0 +1,94 @@
+"""
+Session Store - Agent sessions shared across workers
+Two-tier strategy:
+1. L1: in-process LRU of live agent instances with idle TTL (zero round trips)
+2. L2: Redis holding the agent seed, so any worker rebuilds the same agent
+"""
+import asyncio
+import logging
+import orjson
+from typing import Any, Callable, Dict
+from cachetools import TTLCache
+import redis.asyncio as redis
+from config.settings import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Idle sessions expire from Redis after 30 minutes
+SESSION_TTL_SECONDS = 1800
+
+# Maps session_id -> agent instance (hot sessions in this worker)
+# Bounded and idle-expiring, so abandoned sessions don't leak agents.
+# Only touched from the event loop thread, so no lock is needed.
+_agents: TTLCache = TTLCache(maxsize=1024, ttl=SESSION_TTL_SECONDS)
+
+# Connects lazily on first command
+_redis = redis.Redis.from_url(REDIS_URL)
+
+
+def _seed_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+async def get_or_create(
+    session_id: str,
+    seed: Dict,
+    factory: Callable[[Dict], Any]
+) -> Any:
+    """
+    Get the agent for a session, building it from its seed on a miss.
+
+    Only the seed (the data the agent is built from) is stored in Redis,
+    never the LangChain object. The first worker to see a session owns its
+    seed; every other worker rebuilds from that same seed.
+
+    Args:
+        session_id: Unique session identifier
+        seed: JSON-serializable data the agent is built from
+        factory: Function that builds an agent from a seed
+
+    Returns:
+        Agent instance
+    """
+    # Hot path: sessions are almost always cached, so try the hit first
+    try:
+        agent = _agents[session_id]
+    except KeyError:
+        pass
+    else:
+        # Re-insert to restart the idle timer
+        _agents[session_id] = agent
+        logger.info("♻️ Reusing existing session: %s", session_id)
+        return agent
+
+    key = _seed_key(session_id)
+    try:
+        stored = await _redis.get(key)
+        if stored:
+            seed = orjson.loads(stored)
+            await _redis.expire(key, SESSION_TTL_SECONDS)
+        else:
+            await _redis.set(key, orjson.dumps(seed, default=str), ex=SESSION_TTL_SECONDS)
+    except redis.RedisError as e:
+        # Redis is an optimization - fall back to a worker-local session
+        logger.warning("⚠️ Session store unavailable, using local session: %s", e)
+
+    # Building an agent is synchronous (LangChain setup), so keep it off the loop
+    agent = await asyncio.to_thread(factory, seed)
+
+    # Another request for this session may have built one meanwhile - keep the first
+    agent = _agents.setdefault(session_id, agent)
+    logger.info("✨ New session created: %s", session_id)
+
+    return agent
+
+
+def session_count() -> int:
+    """Number of live agent sessions in this worker"""
+    _agents.expire()
+    return len(_agents)
+
+
+async def close():
+    """Close the Redis connection pool"""
+    await _redis.aclose()
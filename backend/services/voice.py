@@ -3,47 +3,128 @@ Voice Pipeline Service
 Audio format conversions and streaming utilities
 Deepgram STT and ElevenLabs TTS integration
 """
-import base64
-import audioop
-import struct
 import asyncio
+import hashlib
+import logging
 import os
-import io
-import json
-from typing import Optional, Callable
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+import orjson
+from typing import AsyncIterator, List, Optional, Callable
+import numpy as np
+import pybase64
+from cachetools import LRUCache
 from deepgram import DeepgramClient, LiveTranscriptionEvents, LiveOptions
-from elevenlabs import generate, Voice
-from pydub import AudioSegment
 import httpx
+from config.settings import TTS_CACHE_DIR
 
+logger = logging.getLogger(__name__)
 
-def mulaw_to_pcm(mulaw_data: bytes) -> bytes:
+
+def _build_mulaw_decode_table() -> np.ndarray:
+    """Decode all 256 μ-law codes to 16-bit PCM (ITU-T G.711)"""
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = (codes & 0x0F).astype(np.int32)
+
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+
+    return np.where(sign, -magnitude, magnitude).astype(np.int16)
+
+
+# μ-law code -> 16-bit PCM sample
+MULAW_DECODE_TABLE = _build_mulaw_decode_table()
+
+# Same table as float32, so decoding yields samples ready for filtering
+# in a single gather (no per-frame astype pass)
+MULAW_DECODE_TABLE_FLOAT = MULAW_DECODE_TABLE.astype(np.float32)
+
+
+def _build_halfband_taps(num_taps: int = 8) -> np.ndarray:
+    """
+    Odd-phase taps of a 2x half-band interpolator (windowed sinc).
+
+    The even output phase is the input itself, so only the in-between
+    samples need filtering; they sit at offsets ±0.5, ±1.5, ... from the taps.
+    """
+    offsets = np.arange(num_taps) - (num_taps - 1) / 2
+    window = np.cos(np.pi * offsets / (num_taps + 1)) ** 2
+    taps = np.sinc(offsets) * window
+
+    return (taps / taps.sum()).astype(np.float32)
+
+
+# 8-tap odd phase for 8kHz → 16kHz (replaces linear interpolation, which
+# leaves audible imaging above 4kHz)
+HALFBAND_TAPS = _build_halfband_taps()
+HALFBAND_PAD = (len(HALFBAND_TAPS) // 2 - 1, len(HALFBAND_TAPS) // 2)
+
+
+def mulaw_to_pcm(mulaw_data: bytes, out: Optional[np.ndarray] = None) -> bytes:
     """
     Convert μ-law (8kHz, 8-bit) to PCM (16kHz, 16-bit).
 
-    Twilio sends audio as μ-law encoded at 8kHz.
-    Deepgram expects PCM at 16kHz.
+    Twilio sends audio as μ-law encoded at 8kHz. Live calls send it to
+    Deepgram as-is; this is for anything that needs 16kHz PCM.
 
     Args:
         mulaw_data: Raw μ-law audio bytes
+        out: Optional reusable int16 buffer so repeated calls don't
+            allocate their output array
 
     Returns:
         PCM audio bytes at 16kHz, 16-bit
     """
-    # Step 1: Decode μ-law to linear PCM (8kHz, 16-bit)
-    pcm_8khz = audioop.ulaw2lin(mulaw_data, 2)  # 2 = 16-bit samples
-
-    # Step 2: Resample from 8kHz to 16kHz
-    pcm_16khz, _ = audioop.ratecv(
-        pcm_8khz,      # Input fragment
-        2,              # Sample width (16-bit = 2 bytes)
-        1,              # Number of channels (mono)
-        8000,           # Input sample rate
-        16000,          # Output sample rate
-        None            # State (None for first call)
-    )
+    # Step 1: Decode μ-law to linear PCM (8kHz) - one table gather per sample
+    codes = np.frombuffer(mulaw_data, dtype=np.uint8)
+    pcm_8khz = MULAW_DECODE_TABLE_FLOAT[codes]
+
+    num_samples = len(pcm_8khz)
+    if num_samples == 0:
+        return b''
+
+    # Step 2: Upsample from 8kHz to 16kHz (polyphase half-band filter:
+    # even outputs are the input samples, odd outputs are filtered)
+    if out is None or len(out) < 2 * num_samples:
+        out = np.empty(2 * num_samples, dtype=np.int16)
+    pcm_16khz = out[:2 * num_samples]
+
+    padded = np.pad(pcm_8khz, HALFBAND_PAD, mode='edge')
+    odd = np.convolve(padded, HALFBAND_TAPS, mode='valid')
+
+    pcm_16khz[0::2] = MULAW_DECODE_TABLE[codes]
+    pcm_16khz[1::2] = np.clip(np.rint(odd), -32768, 32767)
+
+    return pcm_16khz.tobytes()
+
+
+def _build_mulaw_encode_table() -> np.ndarray:
+    """Encode all 65536 16-bit PCM values to μ-law (ITU-T G.711, same output as audioop.lin2ulaw)"""
+    # Index i holds the sample whose bit pattern is i (i.e. int16 viewed as uint16)
+    samples = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.int16).astype(np.int32)
+
+    # Segment (exponent) for a biased 14-bit magnitude, indexed by magnitude >> 6
+    segments = np.array([value.bit_length() for value in range(256)], dtype=np.int32)
 
-    return pcm_16khz
+    value = samples >> 2
+    mask = np.where(value < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(value), 8158) + 33
+    segment = segments[magnitude >> 6]
+    mantissa = (magnitude >> (segment + 1)) & 0x0F
+
+    return (((segment << 4) | mantissa) ^ mask).astype(np.uint8)
+
+
+# 16-bit PCM sample (as uint16 bit pattern) -> μ-law code (64KB, stays in cache)
+MULAW_ENCODE_TABLE = _build_mulaw_encode_table()
+
+
+def _encode_mulaw(samples: np.ndarray) -> bytes:
+    """Encode 16-bit PCM samples (any integer dtype, in int16 range) to μ-law with one table gather"""
+    return MULAW_ENCODE_TABLE[samples.astype(np.uint16)].tobytes()
 
 
 def pcm_to_mulaw(pcm_data: bytes, sample_rate: int = 24000) -> bytes:
@@ -60,23 +141,23 @@ def pcm_to_mulaw(pcm_data: bytes, sample_rate: int = 24000) -> bytes:
     Returns:
         μ-law audio bytes at 8kHz, 8-bit
     """
+    samples = np.frombuffer(pcm_data, dtype=np.int16).astype(np.int32)
+    if len(samples) == 0:
+        return b''
+
     # Step 1: Resample to 8kHz if needed
-    if sample_rate != 8000:
-        pcm_8khz, _ = audioop.ratecv(
-            pcm_data,       # Input fragment
-            2,              # Sample width (16-bit = 2 bytes)
-            1,              # Number of channels (mono)
-            sample_rate,    # Input sample rate
-            8000,           # Output sample rate (8kHz for Twilio)
-            None            # State
-        )
-    else:
-        pcm_8khz = pcm_data
+    if sample_rate != TWILIO_SAMPLE_RATE:
+        factor, remainder = divmod(sample_rate, TWILIO_SAMPLE_RATE)
+        if remainder == 0:
+            # Integer ratio (16k, 24k, 48k): average each group of samples
+            usable = len(samples) - len(samples) % factor
+            samples = samples[:usable].reshape(-1, factor).sum(axis=1) // factor
+        else:
+            positions = np.arange(0, len(samples), sample_rate / TWILIO_SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int32)
 
     # Step 2: Encode to μ-law
-    mulaw_data = audioop.lin2ulaw(pcm_8khz, 2)  # 2 = 16-bit samples
-
-    return mulaw_data
+    return _encode_mulaw(samples)
 
 
 def encode_audio_for_twilio(pcm_data: bytes, sample_rate: int = 24000) -> str:
@@ -96,7 +177,7 @@ def encode_audio_for_twilio(pcm_data: bytes, sample_rate: int = 24000) -> str:
     mulaw_data = pcm_to_mulaw(pcm_data, sample_rate)
 
     # Base64 encode
-    b64_encoded = base64.b64encode(mulaw_data).decode('utf-8')
+    b64_encoded = pybase64.b64encode(mulaw_data).decode('utf-8')
 
     return b64_encoded
 
@@ -114,7 +195,7 @@ def decode_audio_from_twilio(b64_mulaw: str) -> bytes:
         PCM audio bytes at 16kHz, 16-bit
     """
     # Base64 decode
-    mulaw_data = base64.b64decode(b64_mulaw)
+    mulaw_data = pybase64.b64decode(b64_mulaw, validate=False)
 
     # Convert to PCM
     pcm_data = mulaw_to_pcm(mulaw_data)
@@ -122,11 +203,13 @@ def decode_audio_from_twilio(b64_mulaw: str) -> bytes:
     return pcm_data
 
 
+@lru_cache(maxsize=16)
 def create_silence(duration_ms: int = 500) -> bytes:
     """
     Create silent audio buffer.
 
-    Useful for padding or preventing audio gaps.
+    Useful for padding or preventing audio gaps. Cached per duration
+    (bytes are immutable, so callers can share one buffer).
 
     Args:
         duration_ms: Duration in milliseconds
@@ -137,10 +220,8 @@ def create_silence(duration_ms: int = 500) -> bytes:
     sample_rate = 16000
     num_samples = int(sample_rate * duration_ms / 1000)
 
-    # Create zeros (silence) as 16-bit signed integers
-    silence = struct.pack('<' + ('h' * num_samples), *([0] * num_samples))
-
-    return silence
+    # Zero bytes are silent 16-bit samples
+    return bytes(2 * num_samples)
 
 
 # Audio quality settings
@@ -157,26 +238,47 @@ BUFFER_DURATION_MS = 20  # milliseconds between chunks
 # DEEPGRAM STT INTEGRATION
 # ============================================================================
 
+@lru_cache(maxsize=1)
+def get_deepgram_client() -> DeepgramClient:
+    """Shared Deepgram client (created on first use, reused by every call)"""
+    from config.settings import DEEPGRAM_API_KEY
+
+    if not DEEPGRAM_API_KEY:
+        raise ValueError("DEEPGRAM_API_KEY not configured")
+
+    return DeepgramClient(DEEPGRAM_API_KEY)
+
+
 async def initialize_deepgram_stream(
     call_sid: str,
-    on_transcript_callback: Callable[[str, bool], None]
+    on_transcript_callback: Callable[[str, bool], None],
+    encoding: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None
 ):
     """
     Initialize Deepgram WebSocket for real-time transcription.
 
+    Finalized segments are joined until Deepgram marks the end of speech
+    (endpointing, or UtteranceEnd as a fallback on noisy lines), then the
+    whole utterance is passed with is_final=True. Interim results and
+    segments mid-utterance are passed with is_final=False, so callers can
+    tell the user is speaking (e.g. to stop playback).
+
+    The connection uses Deepgram's asyncio client, so the callback runs on
+    the event loop and may touch loop objects (queues, tasks) directly.
+
     Args:
         call_sid: Unique call identifier
         on_transcript_callback: Function to call with (transcript, is_final) when transcription received
+        encoding: Raw audio encoding (e.g. "linear16"), if not auto-detected
+        sample_rate: Raw audio sample rate
+        channels: Raw audio channel count
 
     Returns:
         Deepgram connection object
     """
-    from config.settings import DEEPGRAM_API_KEY
-
-    if not DEEPGRAM_API_KEY:
-        raise ValueError("DEEPGRAM_API_KEY not configured")
-
-    deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+    deepgram = get_deepgram_client()
 
     # Configure transcription options
     options = LiveOptions(
@@ -184,43 +286,67 @@ async def initialize_deepgram_stream(
         language="en-US",
         smart_format=True,
         interim_results=True,
-        endpointing=300,  # ms of silence before finalizing
+        endpointing=200,  # ms of silence before finalizing
         punctuate=True,
-        utterance_end_ms=1000  # End utterance after 1 second silence
+        utterance_end_ms=1000,  # Fallback end of utterance when endpointing never fires
+        encoding=encoding,
+        sample_rate=sample_rate,
+        channels=channels
     )
 
-    # Create WebSocket connection
-    dg_connection = deepgram.listen.websocket.v("1")
+    # Create WebSocket connection (asyncio client: handlers run on the event loop,
+    # not on an SDK thread)
+    dg_connection = deepgram.listen.asyncwebsocket.v("1")
+
+    # Finalized segments of the utterance in progress
+    segments = []
+
+    def deliver(transcript: str, is_final: bool):
+        """Pass a transcript to the callback, logging its errors (the SDK discards them)"""
+        try:
+            on_transcript_callback(transcript, is_final)
+        except Exception as e:
+            logger.exception("❌ [%s] Error handling transcript: %s", call_sid, e)
+
+    def finish_utterance():
+        """Send the finalized segments to the callback as one utterance"""
+        utterance = " ".join(segments)
+        segments.clear()
+
+        logger.info("🎤 [%s] Deepgram final: %s", call_sid, utterance)
+        deliver(utterance, True)
 
     # Event handlers
-    def on_message(self, result, **kwargs):
+    async def on_message(self, result, **kwargs):
         """Handle transcription results"""
         sentence = result.channel.alternatives[0].transcript
 
-        if len(sentence) == 0:
-            return
-
-        # Check if final result (not interim)
-        if result.is_final:
-            # Check if utterance is complete (detected by endpointing)
-            if result.speech_final:
-                # Complete utterance - send to agent
-                print(f"🎤 [{call_sid}] Deepgram final: {sentence}")
-                on_transcript_callback(sentence, True)
-            else:
-                # Partial final (word finalized but utterance continues)
-                on_transcript_callback(sentence, False)
-
-    def on_error(self, error, **kwargs):
+        if result.is_final and sentence:
+            segments.append(sentence)
+
+        # Check if utterance is complete (detected by endpointing)
+        if result.speech_final and segments:
+            finish_utterance()
+        elif sentence:
+            # Interim result, or a finalized segment mid-utterance
+            deliver(sentence, False)
+
+    async def on_utterance_end(self, utterance_end, **kwargs):
+        """Handle silence after speech that endpointing didn't finalize"""
+        if segments:
+            finish_utterance()
+
+    async def on_error(self, error, **kwargs):
         """Handle errors"""
-        print(f"❌ Deepgram error for {call_sid}: {error}")
+        logger.error("❌ Deepgram error for %s: %s", call_sid, error)
 
-    def on_close(self, close_event, **kwargs):
+    async def on_close(self, close_event, **kwargs):
         """Handle connection close"""
-        print(f"📴 Deepgram connection closed for {call_sid}")
+        logger.info("📴 Deepgram connection closed for %s", call_sid)
 
     # Register event handlers
     dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
+    dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, on_utterance_end)
     dg_connection.on(LiveTranscriptionEvents.Error, on_error)
     dg_connection.on(LiveTranscriptionEvents.Close, on_close)
 
@@ -228,7 +354,7 @@ async def initialize_deepgram_stream(
     if not await dg_connection.start(options):
         raise Exception("Failed to start Deepgram connection")
 
-    print(f"✅ Deepgram stream initialized for {call_sid}")
+    logger.info("✅ Deepgram stream initialized for %s", call_sid)
     return dg_connection
 
 
@@ -236,17 +362,45 @@ async def initialize_deepgram_stream(
 # ELEVENLABS TTS INTEGRATION
 # ============================================================================
 
-async def text_to_speech(text: str, voice_id: Optional[str] = None) -> bytes:
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
     """
-    Convert text to speech using ElevenLabs.
+    Get the shared HTTP client for ElevenLabs requests.
 
-    Args:
-        text: Text to convert to speech
-        voice_id: Optional voice ID (uses default from env if not provided)
+    Built once per process so TTS requests reuse pooled keep-alive
+    connections (and HTTP/2) instead of a new TCP/TLS handshake each time.
 
     Returns:
-        Audio data (MP3 format)
+        Async HTTP client (closed by close_http_client on shutdown)
     """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        # Compressed audio can only be decoded once enough of the body arrives,
+        # which stalls streaming - audio is already compressed, so ask for it raw
+        headers={"Accept-Encoding": "identity"},
+        # httpx drops idle connections after 5s by default - longer than the
+        # gap between most conversation turns, so each turn would re-handshake
+        limits=httpx.Limits(max_keepalive_connections=100, keepalive_expiry=300)
+    )
+
+
+async def close_http_client():
+    """Close the shared HTTP client, if it was ever created"""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+
+ELEVENLABS_MODEL_ID = "eleven_turbo_v2"  # Fastest model for low latency
+ELEVENLABS_VOICE_SETTINGS = {
+    "stability": 0.7,
+    "similarity_boost": 0.8,
+    "style": 0.5,
+    "use_speaker_boost": True
+}
+
+
+def _elevenlabs_request(text: str, voice_id: Optional[str], output_format: Optional[str]) -> dict:
+    """Build the ElevenLabs streaming TTS request (httpx keyword arguments)"""
     from config.settings import ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID
 
     if not ELEVENLABS_API_KEY:
@@ -255,44 +409,178 @@ async def text_to_speech(text: str, voice_id: Optional[str] = None) -> bytes:
     if not voice_id:
         voice_id = ELEVENLABS_VOICE_ID
 
-    try:
-        print(f"🔊 Converting to speech: {text[:50]}...")
-
+    return {
         # Use ElevenLabs streaming API
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
-
-        headers = {
-            "Accept": "audio/mpeg",
+        "url": f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream",
+        "headers": {
+            "Accept": "audio/*" if output_format else "audio/mpeg",
             "xi-api-key": ELEVENLABS_API_KEY,
             "Content-Type": "application/json"
-        }
-
-        data = {
+        },
+        "json": {
             "text": text,
-            "model_id": "eleven_turbo_v2",  # Fastest model for low latency
-            "voice_settings": {
-                "stability": 0.7,
-                "similarity_boost": 0.8,
-                "style": 0.5,
-                "use_speaker_boost": True
-            }
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=data, headers=headers)
-
-            if response.status_code == 200:
-                audio_data = response.content
-                print(f"✅ Generated {len(audio_data)} bytes of audio")
-                return audio_data
-            else:
+            "model_id": ELEVENLABS_MODEL_ID,
+            "voice_settings": ELEVENLABS_VOICE_SETTINGS
+        },
+        "params": {"output_format": output_format} if output_format else None
+    }
+
+
+async def text_to_speech(
+    text: str,
+    voice_id: Optional[str] = None,
+    output_format: Optional[str] = None
+) -> bytes:
+    """
+    Convert text to speech using ElevenLabs.
+
+    Args:
+        text: Text to convert to speech
+        voice_id: Optional voice ID (uses default from env if not provided)
+        output_format: Optional ElevenLabs output format (e.g. "pcm_24000")
+
+    Returns:
+        Audio data (MP3 format unless output_format is given)
+    """
+    request = _elevenlabs_request(text, voice_id, output_format)
+
+    try:
+        logger.info("🔊 Converting to speech: %s...", text[:50])
+
+        response = await get_http_client().post(**request)
+
+        if response.status_code == 200:
+            audio_data = response.content
+            logger.info("✅ Generated %d bytes of audio", len(audio_data))
+            return audio_data
+        else:
+            raise Exception(f"ElevenLabs API error: {response.status_code} - {response.text}")
+
+    except Exception as e:
+        logger.error("❌ ElevenLabs TTS error: %s", e)
+        raise
+
+
+async def stream_text_to_speech(
+    text: str,
+    voice_id: Optional[str] = None,
+    output_format: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Convert text to speech using ElevenLabs, yielding audio as it arrives.
+
+    Args:
+        text: Text to convert to speech
+        voice_id: Optional voice ID (uses default from env if not provided)
+        output_format: Optional ElevenLabs output format (e.g. "pcm_24000")
+
+    Yields:
+        Audio bytes as sent by ElevenLabs (chunks may split samples)
+    """
+    request = _elevenlabs_request(text, voice_id, output_format)
+
+    try:
+        logger.info("🔊 Streaming speech: %s...", text[:50])
+
+        async with get_http_client().stream("POST", **request) as response:
+            if response.status_code != 200:
+                await response.aread()
                 raise Exception(f"ElevenLabs API error: {response.status_code} - {response.text}")
 
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
     except Exception as e:
-        print(f"❌ ElevenLabs TTS error: {e}")
+        logger.error("❌ ElevenLabs TTS error: %s", e)
         raise
 
 
+async def stream_text_to_speech_for_twilio(
+    text: str,
+    voice_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Convert text to speech for Twilio (μ-law, 8kHz), chunk by chunk.
+
+    Audio is requested as μ-law 8kHz (ElevenLabs' ulaw_8000, exactly what
+    Twilio plays), so there is no decode, resample or encode step; each
+    chunk is yielded as soon as ElevenLabs sends it, so playback can start
+    before synthesis finishes.
+
+    Args:
+        text: Text to convert
+        voice_id: Optional voice ID
+
+    Yields:
+        μ-law audio bytes at 8kHz ready for Twilio
+    """
+    async for chunk in stream_text_to_speech(text, voice_id, "ulaw_8000"):
+        yield chunk
+
+
+async def stream_text_input_to_speech_for_twilio(
+    texts: AsyncIterator[str],
+    voice_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Convert text to speech for Twilio while the text is still being written.
+
+    Uses the ElevenLabs stream-input WebSocket: each text (a sentence from
+    the LLM) is sent as soon as it's ready and audio comes back concurrently
+    as μ-law 8kHz, so synthesis overlaps generation within one connection.
+    auto_mode skips the server-side chunk buffering, since we send whole sentences.
+
+    Args:
+        texts: Text to speak, in order (e.g. sentences as the LLM finishes them)
+        voice_id: Optional voice ID
+
+    Yields:
+        μ-law audio bytes at 8kHz ready for Twilio
+    """
+    import websockets
+    from config.settings import ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID
+
+    if not ELEVENLABS_API_KEY:
+        raise ValueError("ELEVENLABS_API_KEY not configured")
+
+    url = (
+        f"wss://api.elevenlabs.io/v1/text-to-speech/{voice_id or ELEVENLABS_VOICE_ID}/stream-input"
+        f"?model_id={ELEVENLABS_MODEL_ID}&output_format=ulaw_8000&auto_mode=true"
+    )
+
+    async with websockets.connect(url) as ws:
+        # First message opens the stream (text must be a single space)
+        await ws.send(orjson.dumps({
+            "text": " ",
+            "voice_settings": ELEVENLABS_VOICE_SETTINGS,
+            "xi_api_key": ELEVENLABS_API_KEY
+        }).decode())
+
+        async def send_texts():
+            try:
+                async for text in texts:
+                    # Each text must end with a space so words aren't run together
+                    await ws.send(orjson.dumps({"text": text + " "}).decode())
+            finally:
+                # Empty text closes the stream once the rest is synthesized
+                # (also on errors, so the receive loop below never hangs)
+                await ws.send('{"text":""}')
+
+        sender = asyncio.create_task(send_texts())
+        try:
+            async for message in ws:
+                data = orjson.loads(message)
+                if data.get("audio"):
+                    yield pybase64.b64decode(data["audio"], validate=False)
+                if data.get("isFinal"):
+                    break
+
+            # Surface errors from the text source (e.g. the LLM call)
+            await sender
+        finally:
+            sender.cancel()
+
+
 async def text_to_speech_for_twilio(text: str, voice_id: Optional[str] = None) -> bytes:
     """
     Convert text to speech and format for Twilio (μ-law, 8kHz).
@@ -304,62 +592,270 @@ async def text_to_speech_for_twilio(text: str, voice_id: Optional[str] = None) -
     Returns:
         μ-law audio bytes at 8kHz ready for Twilio
     """
-    # Get MP3 from ElevenLabs
-    mp3_audio = await text_to_speech(text, voice_id)
+    mulaw_8khz = b''.join([chunk async for chunk in stream_text_to_speech_for_twilio(text, voice_id)])
+
+    logger.info("✅ Converted to Twilio format: %d bytes", len(mulaw_8khz))
+    return mulaw_8khz
 
-    # Convert MP3 to PCM
-    audio = AudioSegment.from_mp3(io.BytesIO(mp3_audio))
 
-    # Convert to 16kHz mono PCM (16-bit)
-    audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
-    pcm_16khz = audio.raw_data
+# Maps (text, voice_id) -> μ-law audio for recurring phrases (greeting,
+# "could you repeat that", hours...). Bounded by total audio size, ~50 MB.
+PHRASE_AUDIO_CACHE_BYTES = 50 * 1024 * 1024
+_phrase_audio: LRUCache = LRUCache(maxsize=PHRASE_AUDIO_CACHE_BYTES, getsizeof=len)
 
-    # Convert to μ-law 8kHz for Twilio
-    mulaw_8khz = pcm_to_mulaw(pcm_16khz, sample_rate=16000)
+# Phrase audio is also kept on disk, so restarts and other workers on the
+# same host skip ElevenLabs too. Files unused for a day are pruned.
+TTS_CACHE_MAX_AGE_SECONDS = 24 * 60 * 60
+TTS_CACHE_PRUNE_INTERVAL_SECONDS = 60 * 60
 
-    print(f"✅ Converted to Twilio format: {len(mulaw_8khz)} bytes")
-    return mulaw_8khz
+
+def _tts_cache_path(text: str, voice_id: Optional[str]) -> Path:
+    """Disk cache file for a phrase (keyed on everything that changes the audio)"""
+    from config.settings import ELEVENLABS_VOICE_ID
+
+    key = orjson.dumps(
+        [voice_id or ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_SETTINGS, text],
+        option=orjson.OPT_SORT_KEYS
+    )
+    return Path(TTS_CACHE_DIR) / f"{hashlib.sha256(key).hexdigest()}.ulaw"
+
+
+def _read_tts_cache(path: Path) -> Optional[bytes]:
+    """Read cached phrase audio, refreshing its mtime so pruning keeps it"""
+    try:
+        audio = path.read_bytes()
+        os.utime(path)
+        return audio
+    except FileNotFoundError:
+        return None
+
+
+def _write_tts_cache(path: Path, audio: bytes):
+    """Write phrase audio atomically (readers never see a partial file)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # A unique temp file per write, so concurrent writers of one phrase
+    # (in this process or another) never share it
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        tmp.write(audio)
+
+    try:
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def prune_tts_cache() -> int:
+    """
+    Delete disk-cached phrase audio unused for TTS_CACHE_MAX_AGE_SECONDS.
+
+    Returns:
+        Number of files removed
+    """
+    cutoff = time.time() - TTS_CACHE_MAX_AGE_SECONDS
+    removed = 0
+
+    try:
+        entries = list(os.scandir(TTS_CACHE_DIR))
+    except FileNotFoundError:
+        return 0
+
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+
+    return removed
+
+
+async def prune_tts_cache_forever():
+    """Prune the disk TTS cache every TTS_CACHE_PRUNE_INTERVAL_SECONDS (run as a task)"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(prune_tts_cache)
+            if removed:
+                logger.info("🧹 Pruned %d cached TTS files", removed)
+        except Exception as e:
+            logger.warning("⚠️ TTS cache pruning failed: %s", e)
+
+        await asyncio.sleep(TTS_CACHE_PRUNE_INTERVAL_SECONDS)
+
+
+async def phrase_to_speech_for_twilio(text: str, voice_id: Optional[str] = None) -> bytes:
+    """
+    Like text_to_speech_for_twilio, but repeated phrases come from a cache.
+
+    Skips the ElevenLabs request whenever the same text has been spoken
+    before (by any call): first from memory, then from the disk cache.
+
+    Args:
+        text: Phrase to convert
+        voice_id: Optional voice ID
+
+    Returns:
+        μ-law audio bytes at 8kHz ready for Twilio
+    """
+    return b''.join([chunk async for chunk in stream_phrase_to_speech_for_twilio(text, voice_id)])
+
+
+async def stream_phrase_to_speech_for_twilio(
+    text: str,
+    voice_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Streaming version of phrase_to_speech_for_twilio.
+
+    Cache hits yield the whole phrase at once; misses stream from
+    ElevenLabs and cache the audio (in memory and on disk) once it's complete.
+
+    Args:
+        text: Phrase to convert
+        voice_id: Optional voice ID
+
+    Yields:
+        μ-law audio bytes at 8kHz ready for Twilio
+    """
+    key = (text, voice_id)
+    audio = _phrase_audio.get(key)
+    if audio is not None:
+        yield audio
+        return
+
+    path = _tts_cache_path(text, voice_id)
+    audio = await asyncio.to_thread(_read_tts_cache, path)
+    if audio:
+        if len(audio) <= PHRASE_AUDIO_CACHE_BYTES:
+            _phrase_audio[key] = audio
+        yield audio
+        return
+
+    chunks = []
+    async for chunk in stream_text_to_speech_for_twilio(text, voice_id):
+        chunks.append(chunk)
+        yield chunk
+
+    audio = b''.join(chunks)
+    if len(audio) <= PHRASE_AUDIO_CACHE_BYTES:
+        _phrase_audio[key] = audio
+
+    try:
+        await asyncio.to_thread(_write_tts_cache, path, audio)
+    except OSError as e:
+        logger.warning("⚠️ Could not write TTS cache file: %s", e)
+
+
+# Closes the media message opened by twilio_media_prefix
+TWILIO_MEDIA_SUFFIX = '"}}'
+
+
+def twilio_media_prefix(stream_sid: str) -> str:
+    """
+    Build the fixed start of every outbound media message for a stream.
+
+    Each message is then prefix + base64 payload + TWILIO_MEDIA_SUFFIX,
+    with no dict or JSON serialization per frame.
+
+    Args:
+        stream_sid: Twilio stream identifier
+
+    Returns:
+        JSON text up to the opening quote of the payload
+    """
+    return '{"event":"media","streamSid":' + orjson.dumps(stream_sid).decode() + ',"media":{"payload":"'
+
+
+def twilio_clear_message(stream_sid: str) -> str:
+    """Message telling Twilio to drop audio it has buffered but not yet played"""
+    return orjson.dumps({"event": "clear", "streamSid": stream_sid}).decode()
+
+
+# With ramp_up, chunks start at half chunk_size and double up to this many chunk_sizes
+RAMP_UP_MAX_CHUNKS = 4
+
+
+def _chunk_offsets(length: int, chunk_size: int, ramp_up: bool) -> List[int]:
+    """Start offset of each chunk of a buffer (see stream_audio_to_twilio_websocket)"""
+    offsets = []
+    offset = 0
+    size = chunk_size // 2 if ramp_up else chunk_size
+
+    while offset < length:
+        offsets.append(offset)
+        offset += size
+        if ramp_up and size < chunk_size * RAMP_UP_MAX_CHUNKS:
+            size *= 2
+
+    return offsets
 
 
 async def stream_audio_to_twilio_websocket(
     websocket,
     stream_sid: str,
     audio_mulaw: bytes,
-    chunk_size: int = 160
+    chunk_size: int = 240,
+    message_prefix: Optional[str] = None,
+    ramp_up: bool = False
 ):
     """
-    Stream audio to Twilio WebSocket in chunks.
+    Stream audio to Twilio WebSocket in real-time paced chunks.
+
+    Every message is built up front, then each chunk is sent when the audio
+    before it would have finished playing (start + its offset in time, on the
+    loop's monotonic clock), so encode and send time don't add up as drift
+    the way a fixed sleep between chunks does.
+
+    With ramp_up (the start of an utterance), the first chunk is only half a
+    chunk_size so the caller hears audio sooner, and sizes then double up to
+    RAMP_UP_MAX_CHUNKS chunk_sizes, cutting per-message overhead for the rest.
 
     Args:
         websocket: Twilio WebSocket connection
         stream_sid: Twilio stream identifier
         audio_mulaw: μ-law audio bytes at 8kHz
-        chunk_size: Bytes per chunk (160 = 20ms for 8kHz μ-law)
+        chunk_size: Bytes per chunk (240 = 30ms for 8kHz μ-law)
+        message_prefix: Cached twilio_media_prefix(stream_sid) for the call
+        ramp_up: Start with small chunks and grow them (first audio of an utterance)
     """
-    # Split into 20ms chunks (160 bytes for μ-law 8kHz)
-    chunks = [audio_mulaw[i:i+chunk_size] for i in range(0, len(audio_mulaw), chunk_size)]
+    if message_prefix is None:
+        message_prefix = twilio_media_prefix(stream_sid)
+
+    offsets = _chunk_offsets(len(audio_mulaw), chunk_size, ramp_up)
+
+    # Base64 is always JSON-safe, so payloads are spliced in directly
+    if all(offset % 3 == 0 for offset in offsets):
+        # Every 3 bytes encode to 4 characters, so when every chunk starts at a
+        # multiple of 3 one encode of the whole buffer slices into per-chunk payloads
+        encoded = pybase64.b64encode(audio_mulaw).decode('ascii')
+        bounds = [offset // 3 * 4 for offset in offsets] + [len(encoded)]
+        payloads = [encoded[start:end] for start, end in zip(bounds, bounds[1:])]
+    else:
+        # memoryview slices are zero-copy views of the buffer
+        audio = memoryview(audio_mulaw)
+        bounds = offsets + [len(audio)]
+        payloads = [
+            pybase64.b64encode(audio[start:end]).decode('ascii')
+            for start, end in zip(bounds, bounds[1:])
+        ]
 
-    print(f"📤 Streaming {len(chunks)} audio chunks to Twilio")
+    messages = [message_prefix + payload + TWILIO_MEDIA_SUFFIX for payload in payloads]
 
-    # Send chunks to Twilio
-    for i, chunk in enumerate(chunks):
-        # Base64 encode
-        payload = base64.b64encode(chunk).decode('utf-8')
+    logger.debug("📤 Streaming %d audio chunks to Twilio", len(messages))
 
-        # Send media message
-        message = {
-            "event": "media",
-            "streamSid": stream_sid,
-            "media": {
-                "payload": payload
-            }
-        }
+    loop = asyncio.get_running_loop()
+    start = loop.time()
 
-        await websocket.send_text(json.dumps(message))
+    for offset, message in zip(offsets, messages):
+        # Wait for this chunk's slot - 1 byte per sample, so the offset in
+        # bytes is its time in samples (no wait if sending has fallen behind)
+        delay = start + offset / TWILIO_SAMPLE_RATE - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-        # Small delay to maintain timing (20ms per chunk)
-        # Only delay between chunks, not after the last one
-        if i < len(chunks) - 1:
-            await asyncio.sleep(0.02)
+        # Send media message (Twilio only accepts text frames)
+        await websocket.send_text(message)
 
-    print(f"✅ Finished streaming {len(chunks)} chunks")
+    logger.debug("✅ Finished streaming %d chunks", len(messages))
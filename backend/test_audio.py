@@ -0,0 +1,166 @@
+"""
+Tests for the voice pipeline's pure helpers
+μ-law codec tables, Twilio chunk offsets, sentence splitting, transcript previews
+Run with: pytest test_audio.py
+"""
+import sys
+import os
+import asyncio
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.voice import (
+    MULAW_DECODE_TABLE,
+    RAMP_UP_MAX_CHUNKS,
+    _chunk_offsets,
+    _encode_mulaw,
+    mulaw_to_pcm,
+    pcm_to_mulaw
+)
+from services.memory import TRANSCRIPT_PREVIEW_CHARS, preview_transcript
+from routes.voice import SENTENCE_BOUNDARY, stream_agent_sentences
+
+
+# (16-bit PCM sample, μ-law code) pairs from G.711 (same as audioop.lin2ulaw)
+KNOWN_ENCODINGS = [
+    (0, 0xFF),
+    (1, 0xFF),
+    (-1, 0x7E),
+    (100, 0xF2),
+    (-100, 0x72),
+    (8000, 0xA0),
+    (32767, 0x80),
+    (-32768, 0x00),
+]
+
+# (μ-law code, 16-bit PCM sample) pairs from G.711 (same as audioop.ulaw2lin)
+KNOWN_DECODINGS = [
+    (0x00, -32124),
+    (0x10, -15996),
+    (0x7F, 0),
+    (0x80, 32124),
+    (0xFF, 0),
+]
+
+
+def test_mulaw_decode_known_values():
+    for code, sample in KNOWN_DECODINGS:
+        assert MULAW_DECODE_TABLE[code] == sample
+
+
+def test_mulaw_encode_known_values():
+    samples = np.array([sample for sample, _ in KNOWN_ENCODINGS], dtype=np.int16)
+    assert _encode_mulaw(samples) == bytes(code for _, code in KNOWN_ENCODINGS)
+
+
+def test_mulaw_round_trip_all_codes():
+    codes = np.arange(256, dtype=np.uint8)
+    encoded = _encode_mulaw(MULAW_DECODE_TABLE[codes])
+
+    # 0x7F is μ-law's negative zero, which decodes to 0 and encodes back as 0xFF
+    expected = bytes(0xFF if code == 0x7F else code for code in range(256))
+    assert encoded == expected
+
+
+def test_mulaw_to_pcm_keeps_samples_on_even_outputs():
+    mulaw = bytes(range(256))
+    pcm = np.frombuffer(mulaw_to_pcm(mulaw), dtype=np.int16)
+
+    assert len(pcm) == 2 * len(mulaw)
+    assert np.array_equal(pcm[0::2], MULAW_DECODE_TABLE)
+    assert mulaw_to_pcm(b'') == b''
+
+
+def test_pcm_to_mulaw_resamples_to_8khz():
+    samples = np.array([sample for sample, _ in KNOWN_ENCODINGS], dtype=np.int16)
+
+    # 8kHz is only encoded
+    assert pcm_to_mulaw(samples.tobytes(), sample_rate=8000) == _encode_mulaw(samples)
+
+    # 24kHz averages each group of 3 samples
+    tripled = np.repeat(samples, 3)
+    assert pcm_to_mulaw(tripled.tobytes(), sample_rate=24000) == _encode_mulaw(samples)
+
+
+def test_chunk_offsets_without_ramp():
+    assert _chunk_offsets(1000, 240, ramp_up=False) == [0, 240, 480, 720, 960]
+    assert _chunk_offsets(0, 240, ramp_up=False) == []
+
+
+def test_chunk_offsets_ramp_up():
+    chunk_size = 240
+    offsets = _chunk_offsets(10_000, chunk_size, ramp_up=True)
+    sizes = [end - start for start, end in zip(offsets, offsets[1:])]
+
+    # Half a chunk first, doubling up to the cap, then steady
+    assert sizes[:4] == [120, 240, 480, 960]
+    assert max(sizes) == chunk_size * RAMP_UP_MAX_CHUNKS
+    assert all(size == chunk_size * RAMP_UP_MAX_CHUNKS for size in sizes[4:])
+
+    # Each offset is the sum of the chunks before it, and the last chunk
+    # still starts inside the buffer
+    assert offsets == [sum(sizes[:i]) for i in range(len(offsets))]
+    assert offsets[-1] < 10_000 <= offsets[-1] + chunk_size * RAMP_UP_MAX_CHUNKS
+
+
+def test_sentence_boundary_skips_abbreviations():
+    text = "Meet Mrs. Smith on Main St. at 9 a.m. tomorrow. See you! Bye"
+    assert SENTENCE_BOUNDARY.split(text) == [
+        "Meet Mrs. Smith on Main St. at 9 a.m. tomorrow.",
+        "See you!",
+        "Bye",
+    ]
+
+
+class FakeAgent:
+    """Agent whose astream_events yields canned chat model chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def astream_events(self, inputs, version):
+        for chunk in self.chunks:
+            yield {'event': 'on_chat_model_stream', 'data': {'chunk': FakeChunk(chunk)}}
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+
+def collect_sentences(chunks):
+    async def collect():
+        return [sentence async for sentence in stream_agent_sentences(FakeAgent(chunks), "hi")]
+
+    return asyncio.run(collect())
+
+
+def test_stream_agent_sentences_splits_across_chunks():
+    chunks = ["We open at 6 a.m. on week", "days. Tee times are online", " too.\nAnything else"]
+    assert collect_sentences(chunks) == [
+        "We open at 6 a.m. on weekdays.",
+        "Tee times are online too.",
+        "Anything else",
+    ]
+
+
+def test_stream_agent_sentences_joins_short_sentences():
+    assert collect_sentences(["Sure! We have carts available."]) == [
+        "Sure! We have carts available."
+    ]
+
+
+def test_preview_transcript():
+    short = "User: hi\nAgent: hello"
+    assert preview_transcript(short) == short
+
+    words = "word " * 100
+    preview = preview_transcript(words)
+    assert preview.endswith("word...")
+    assert len(preview) <= TRANSCRIPT_PREVIEW_CHARS + 3
+
+    # Only whitespace before the cut word leaves nothing to keep
+    assert preview_transcript(" " * TRANSCRIPT_PREVIEW_CHARS + "word") == "..."
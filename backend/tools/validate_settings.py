@@ -0,0 +1,48 @@
+"""
+Build-time settings check
+Fails the deploy build if required environment variables are missing,
+so production workers don't have to validate settings on every boot.
+
+Usage:
+    python -m tools.validate_settings
+"""
+import os
+import sys
+from dataclasses import fields
+
+from config.settings import Settings, validate_settings
+
+ENV_EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env.example")
+
+
+def documented_keys() -> set:
+    """Variable names listed in .env.example"""
+    with open(ENV_EXAMPLE) as f:
+        return {
+            line.split("=", 1)[0].strip()
+            for line in f
+            if "=" in line and not line.lstrip().startswith("#")
+        }
+
+
+def main() -> int:
+    undocumented = [
+        f.name.upper() for f in fields(Settings)
+        if f.name.upper() not in documented_keys()
+    ]
+    if undocumented:
+        print(f"❌ Settings missing from .env.example: {', '.join(undocumented)}")
+        return 1
+
+    try:
+        validate_settings()
+    except ValueError as e:
+        print(f"❌ Configuration error: {e}")
+        return 1
+
+    print("✅ Environment variables validated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
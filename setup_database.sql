@@ -66,7 +66,7 @@ CREATE TABLE conversations (
     intent TEXT,
     sentiment TEXT,
     booking_made BOOLEAN DEFAULT FALSE,
-    embedding VECTOR(1536),
+    embedding HALFVEC(1536),  -- fp16: half the size of VECTOR, same recall at 1536 dims
     duration_seconds INTEGER,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -74,7 +74,12 @@ CREATE TABLE conversations (
 CREATE INDEX idx_conversations_caller ON conversations(caller_id);
 CREATE INDEX idx_conversations_golf_course ON conversations(golf_course_id);
 CREATE INDEX idx_conversations_created ON conversations(created_at DESC);
-CREATE INDEX idx_conversations_embedding ON conversations USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- HNSW (unlike ivfflat) needs no training data and keeps recall as rows are added
+CREATE INDEX idx_conversations_embedding ON conversations USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+-- Existing databases (VECTOR column, pgvector 0.7+):
+--   DROP INDEX idx_conversations_embedding;
+--   ALTER TABLE conversations ALTER COLUMN embedding TYPE HALFVEC(1536) USING embedding::halfvec(1536);
+--   then re-create the index above
 
 -- ============================================================================
 -- TABLE 4: demo_courses (Demo System)
@@ -201,6 +206,71 @@ CREATE TRIGGER demo_interaction_counter
     FOR EACH ROW
     EXECUTE FUNCTION increment_demo_interaction_count();
 
+-- Function to record a demo chat turn in one round trip
+-- Locks the demo row, enforces the interaction limit (P0001 = limit reached),
+-- records the interaction and returns the demo with the incremented count
+CREATE OR REPLACE FUNCTION chat_demo_turn(
+    p_slug TEXT,
+    p_session_id TEXT,
+    p_transcript TEXT,
+    p_channel TEXT DEFAULT 'text-chat'
+)
+RETURNS SETOF demo_courses AS $$
+DECLARE
+    demo demo_courses%ROWTYPE;
+BEGIN
+    SELECT * INTO demo FROM demo_courses WHERE slug = p_slug FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Demo not found: %', p_slug USING ERRCODE = 'P0002';
+    END IF;
+
+    IF demo.interaction_count >= demo.interaction_limit THEN
+        RAISE EXCEPTION 'Demo limit reached (% interactions)', demo.interaction_limit
+            USING ERRCODE = 'P0001';
+    END IF;
+
+    -- demo_interaction_counter trigger increments interaction_count
+    INSERT INTO demo_interactions (demo_course_id, channel, transcript, session_id)
+    VALUES (demo.id, p_channel, p_transcript, p_session_id);
+
+    RETURN QUERY SELECT * FROM demo_courses WHERE id = demo.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to claim a demo turn before its reply exists (streamed chat, voice)
+-- Same locked limit check as chat_demo_turn; inserts the interaction with no
+-- transcript yet and returns its id, so the transcript can be filled in later
+CREATE OR REPLACE FUNCTION reserve_demo_turn(
+    p_slug TEXT,
+    p_session_id TEXT,
+    p_channel TEXT DEFAULT 'text-chat'
+)
+RETURNS UUID AS $$
+DECLARE
+    demo demo_courses%ROWTYPE;
+    interaction_id UUID;
+BEGIN
+    SELECT * INTO demo FROM demo_courses WHERE slug = p_slug FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Demo not found: %', p_slug USING ERRCODE = 'P0002';
+    END IF;
+
+    IF demo.interaction_count >= demo.interaction_limit THEN
+        RAISE EXCEPTION 'Demo limit reached (% interactions)', demo.interaction_limit
+            USING ERRCODE = 'P0001';
+    END IF;
+
+    -- demo_interaction_counter trigger increments interaction_count
+    INSERT INTO demo_interactions (demo_course_id, channel, session_id)
+    VALUES (demo.id, p_channel, p_session_id)
+    RETURNING id INTO interaction_id;
+
+    RETURN interaction_id;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to increment caller conversation count
 CREATE OR REPLACE FUNCTION increment_caller_conversation_count()
 RETURNS TRIGGER AS $$
@@ -219,6 +289,49 @@ CREATE TRIGGER conversation_counter
     FOR EACH ROW
     EXECUTE FUNCTION increment_caller_conversation_count();
 
+-- Function to identify (or auto-create) a caller in one round trip
+CREATE OR REPLACE FUNCTION upsert_caller(
+    p_phone_number TEXT,
+    p_golf_course_id UUID
+)
+RETURNS callers AS $$
+    INSERT INTO callers (phone_number, golf_course_id)
+    VALUES (p_phone_number, p_golf_course_id)
+    ON CONFLICT (golf_course_id, phone_number) DO UPDATE SET last_seen = NOW()
+    RETURNING *;
+$$ LANGUAGE sql;
+
+-- Function to identify (or auto-create) a caller and fetch their recent
+-- conversations in one round trip
+CREATE OR REPLACE FUNCTION get_caller_with_history(
+    p_phone_number TEXT,
+    p_golf_course_id UUID,
+    p_limit INT DEFAULT 3
+)
+RETURNS JSONB AS $$
+DECLARE
+    caller callers%ROWTYPE;
+BEGIN
+    INSERT INTO callers (phone_number, golf_course_id)
+    VALUES (p_phone_number, p_golf_course_id)
+    ON CONFLICT (golf_course_id, phone_number) DO UPDATE SET last_seen = NOW()
+    RETURNING * INTO caller;
+
+    RETURN jsonb_build_object(
+        'caller', to_jsonb(caller),
+        'conversations', COALESCE((
+            SELECT jsonb_agg(to_jsonb(c) - 'embedding' ORDER BY c.created_at DESC)
+            FROM (
+                SELECT * FROM conversations
+                WHERE caller_id = caller.id
+                ORDER BY created_at DESC
+                LIMIT p_limit
+            ) c
+        ), '[]'::jsonb)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================================
 -- SAMPLE DATA: Fox Hollow Golf Course
 -- ============================================================================